@@ -1,49 +1,40 @@
 #!/usr/bin/env python3
+import hashlib
 import os
 import sqlite3
-import json
-import time
-import httpx
 import click
-from tamga import Tamga
 from dotenv import load_dotenv
-from datetime import datetime, date
+from collections import defaultdict
+from datetime import date
 import ibm_boto3
 from ibm_botocore.client import Config, ClientError
+from ibm_boto3.s3.transfer import TransferConfig
 
 # Import only the functions that exist and are needed
 from utils import (
-    # Core site collection functions
-    get_random_site,
-    get_random_indieblog,
-    get_hackernews_stories_by_type,
-    get_reduced_indieblog_posts,
     # Main enhanced collection function
     collect_unique_sites_enhanced,
-    # Database functions for English detection
-    update_site_english_status,
-    get_sites_needing_english_check,
-    # Markdown generation functions
-    generate_hackernews_markdown,
-    generate_indieblog_markdown,
-    save_markdown_report,
     # Analysis functions
     analyze_existing_sites_for_english,
     generate_markdown_from_existing_data,
-    check_512kb_site_is_english,
+    # Shared HTTP client
+    http_client,
+    # Hacker News story cache, kept beside the database
+    HN_CACHE_FILENAME,
 )
+from db import DB_FILENAME, get_db_connection, close_db_connection, write_transaction
+from logger import LockedTamga
 
 # Load environment variables
 load_dotenv()
 
 # Configure tamga logger, will set console to false after testing
-logger = Tamga(logToJSON=True, logToConsole=True)
+logger = LockedTamga(logToJSON=True, logToConsole=True)
 
 # Constants for IBM COS values
 COS_ENDPOINT = os.getenv("COS_ENDPOINT")
 COS_API_KEY = os.getenv("CLOUD_OBJECT_STORAGE_APIKEY")
 COS_INSTANCE_CRN = os.getenv("CLOUD_OBJECT_STORAGE_RESOURCE_INSTANCE_ID")
-DB_FILENAME = "random_sites.db"
 COS_BUCKET_NAME = os.getenv("COS_BUCKET_NAME")
 
 # Create client
@@ -55,123 +46,178 @@ cos_client = ibm_boto3.client(
     endpoint_url=COS_ENDPOINT,
 )
 
+# Split database transfers larger than 8 MB into parts sent over parallel connections
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=8,
+    use_threads=True,
+)
 
-# had to add these functions to handle datetime conversion properly in updated sqlite3
-def adapt_datetime(dt):
-    return dt.isoformat()
-
-
-def convert_datetime(s):
-    return datetime.fromisoformat(s)
+# Escapes Discord markdown characters in titles in a single pass
+DISCORD_MARKDOWN_ESCAPES = str.maketrans(
+    {"[": "\\[", "]": "\\]", "*": "\\*", "_": "\\_"}
+)
 
+# Discord blue, used for every embed
+DISCORD_EMBED_COLOR = 3447003
 
-sqlite3.register_adapter(datetime, adapt_datetime)
-sqlite3.register_converter("TIMESTAMP", convert_datetime)
+# Discord allows at most 10 embeds and 6000 embed characters per message
+DISCORD_MAX_EMBEDS = 10
+DISCORD_MAX_EMBED_CHARS = 6000
 
 
 def init_database_enhanced():
     """Initialize the SQLite database with enhanced schema for English detection."""
     logger.debug("Initializing enhanced database")
-    conn = sqlite3.connect("random_sites.db", detect_types=sqlite3.PARSE_DECLTYPES)
-    cursor = conn.cursor()
+    conn = get_db_connection()
+    # Schema changes and index builds are committed together, or not at all
+    with write_transaction(conn):
+        cursor = conn.cursor()
 
-    # Check if the table exists
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='sites'")
-    table_exists = cursor.fetchone() is not None
+        # A single PRAGMA tells us both whether the table exists and which columns it has
+        cursor.execute("PRAGMA table_info(sites)")
+        column_names = {col[1] for col in cursor.fetchall()}
 
-    if not table_exists:
-        # Create table with full schema including English detection fields
+        if not column_names:
+            # Create table with full schema including English detection fields
+            cursor.execute(
+                """
+            CREATE TABLE sites (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT UNIQUE,
+                title TEXT,
+                source TEXT,
+                capture_date TIMESTAMP,
+                has_blog BOOLEAN DEFAULT NULL,
+                blog_status TEXT DEFAULT NULL,
+                blog_posts_md TEXT DEFAULT NULL,
+                last_blog_check TIMESTAMP DEFAULT NULL
+            )
+            """
+            )
+
+            logger.info("Created new database with enhanced schema")
+        else:
+            # Add source column if it doesn't exist (legacy support)
+            if "source" not in column_names:
+                cursor.execute("ALTER TABLE sites ADD COLUMN source TEXT")
+                cursor.execute(
+                    "UPDATE sites SET source = '512kb.club' WHERE source IS NULL"
+                )
+
+            # Add English detection columns if they don't exist
+            new_columns = [
+                ("has_blog", "BOOLEAN DEFAULT NULL"),
+                ("blog_status", "TEXT DEFAULT NULL"),
+                ("blog_posts_md", "TEXT DEFAULT NULL"),
+                ("last_blog_check", "TIMESTAMP DEFAULT NULL"),
+            ]
+
+            for column_name, column_def in new_columns:
+                if column_name not in column_names:
+                    cursor.execute(
+                        f"ALTER TABLE sites ADD COLUMN {column_name} {column_def}"
+                    )
+                    logger.info(f"Added column: {column_name}")
+
+        # Partial covering index for the sites still awaiting an English check, so
+        # --analyze-english reads them without touching the table
         cursor.execute(
             """
-        CREATE TABLE sites (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            url TEXT UNIQUE,
-            title TEXT,
-            source TEXT,
-            capture_date TIMESTAMP,
-            has_blog BOOLEAN DEFAULT NULL,
-            blog_status TEXT DEFAULT NULL,
-            blog_posts_md TEXT DEFAULT NULL,
-            last_blog_check TIMESTAMP DEFAULT NULL
-        )
+            CREATE INDEX IF NOT EXISTS idx_sites_english_pending
+            ON sites(source, has_blog, last_blog_check, url, title)
+            WHERE has_blog IS NULL OR last_blog_check IS NULL
         """
         )
 
-        # Create indexes
+        # Partial covering indexes for the "most recent" report queries, so they
+        # read rows already in order from the index and stop at their LIMIT
         cursor.execute(
             """
-            CREATE INDEX idx_sites_english_analysis
-            ON sites(source, has_blog, last_blog_check)
+            CREATE INDEX IF NOT EXISTS idx_sites_english_recent
+            ON sites(source, has_blog, last_blog_check, url, title)
+            WHERE has_blog = TRUE
         """
         )
+        cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_sites_hn_recent
+            ON sites(capture_date, source, url, title)
+            WHERE source LIKE 'hackernews-%'
+        """
+        )
+        # Per-source recency, for the indieblog report section and the webapp's
+        # per-source id sampling
+        cursor.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_sites_source_recent
+            ON sites(source, capture_date)
+        """
+        )
+        # Superseded by idx_sites_hn_recent
+        cursor.execute("DROP INDEX IF EXISTS idx_sites_capture_date")
+        # Superseded by the partial English indexes above
+        cursor.execute("DROP INDEX IF EXISTS idx_sites_english_analysis")
+
+        # INSERT OR IGNORE relies on a unique index on url for deduplication. The
+        # column constraint provides one, but older databases may have been
+        # created without it
+        unique_indexes = [
+            row[1] for row in cursor.execute("PRAGMA index_list(sites)") if row[2]
+        ]
+        has_unique_url = any(
+            [col[2] for col in cursor.execute(f"PRAGMA index_info({name})")] == ["url"]
+            for name in unique_indexes
+        )
+        if not has_unique_url:
+            try:
+                cursor.execute("CREATE UNIQUE INDEX idx_sites_url ON sites(url)")
+                logger.info("Created unique index on sites.url")
+            except sqlite3.IntegrityError as e:
+                logger.warning(
+                    f"Could not create unique URL index, duplicate URLs exist: {e}"
+                )
 
-        logger.info("Created new database with enhanced schema")
-    else:
-        # Check what columns exist
-        cursor.execute("PRAGMA table_info(sites)")
-        columns = cursor.fetchall()
-        column_names = [col[1] for col in columns]
+    logger.debug("Enhanced database initialized successfully")
 
-        # Add source column if it doesn't exist (legacy support)
-        if "source" not in column_names:
-            cursor.execute("ALTER TABLE sites ADD COLUMN source TEXT")
-            cursor.execute(
-                "UPDATE sites SET source = '512kb.club' WHERE source IS NULL"
-            )
 
-        # Add English detection columns if they don't exist
-        new_columns = [
-            ("has_blog", "BOOLEAN DEFAULT NULL"),
-            ("blog_status", "TEXT DEFAULT NULL"),
-            ("blog_posts_md", "TEXT DEFAULT NULL"),
-            ("last_blog_check", "TIMESTAMP DEFAULT NULL"),
-        ]
+def load_known_urls():
+    """Load every URL already stored in the database into a set for fast lookups."""
+    cursor = get_db_connection().execute("SELECT url FROM sites")
+    return {row[0] for row in cursor}
 
-        for column_name, column_def in new_columns:
-            if column_name not in column_names:
-                cursor.execute(
-                    f"ALTER TABLE sites ADD COLUMN {column_name} {column_def}"
-                )
-                logger.info(f"Added column: {column_name}")
 
-        # Create index if it doesn't exist
-        try:
-            cursor.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_sites_english_analysis
-                ON sites(source, has_blog, last_blog_check)
-            """
-            )
-        except sqlite3.Error as e:
-            logger.debug(f"Index may already exist: {e}")
+def add_urls_to_db(rows):
+    """Add (url, title, source) rows to the database in a single transaction.
 
-    conn.commit()
-    conn.close()
-    logger.debug("Enhanced database initialized successfully")
+    URLs that are already stored are skipped by the UNIQUE constraint on url, so
+    no separate existence check is needed.
 
-
-def url_exists(url):
-    """Check if a URL already exists in the database."""
-    conn = sqlite3.connect("random_sites.db", detect_types=sqlite3.PARSE_DECLTYPES)
-    cursor = conn.cursor()
-    cursor.execute("SELECT 1 FROM sites WHERE url = ?", (url,))
-    exists = cursor.fetchone() is not None
-    conn.close()
-    return exists
-
-
-def add_url_to_db(url, title, source):
-    """Add a URL to the database with current timestamp and source."""
-    conn = sqlite3.connect("random_sites.db", detect_types=sqlite3.PARSE_DECLTYPES)
-    cursor = conn.cursor()
-    now = datetime.now()
-    cursor.execute(
-        "INSERT INTO sites (url, title, source, capture_date) VALUES (?, ?, ?, ?)",
-        (url, title, source, now),
-    )
-    conn.commit()
-    conn.close()
-    logger.info(f"Added to database: {url} - {title} from {source}")
+    Returns:
+        Number of rows that were actually inserted
+    """
+    if not rows:
+        return 0
+    conn = get_db_connection()
+    changes_before = conn.total_changes
+    with write_transaction(conn):
+        # SQLite stamps capture_date itself as local ISO 8601 time with
+        # milliseconds. Older rows written by datetime.isoformat() carry
+        # microseconds, or no fraction at all, but the fields line up, so rows
+        # from both still sort correctly as text
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO sites (url, title, source, capture_date)
+            VALUES (?, ?, ?, strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+        """,
+            rows,
+        )
+    inserted = conn.total_changes - changes_before
+    logger.info(f"Added {inserted} of {len(rows)} sites to database")
+    if inserted < len(rows):
+        logger.warning(f"Skipped {len(rows) - inserted} URLs already in database")
+    return inserted
 
 
 def send_discord_webhook(urls_and_titles):
@@ -190,18 +236,10 @@ def send_discord_webhook(urls_and_titles):
         return False
 
     # Group sites by source
-    sites_by_source = {}
+    sites_by_source = defaultdict(list)
     for url, title, source in urls_and_titles:
-        if source not in sites_by_source:
-            sites_by_source[source] = []
-
         # Clean up title for formatting
-        clean_title = (
-            title.replace("[", "\\[")
-            .replace("]", "\\]")
-            .replace("*", "\\*")
-            .replace("_", "\\_")
-        )
+        clean_title = title.translate(DISCORD_MARKDOWN_ESCAPES)
         if len(clean_title) > 50:
             clean_title = clean_title[:47] + "..."
 
@@ -211,38 +249,59 @@ def send_discord_webhook(urls_and_titles):
     today = date.today().strftime("%Y-%m-%d")
 
     # Create embeds for each source
-    embeds = []
-
-    for source, sites in sites_by_source.items():
-        site_list = "\n".join([f"• [{title}]({url})" for url, title in sites])
-        embeds.append(
-            {
-                "title": f"Sites from {source}",
-                "description": site_list,
-                "color": 3447003,  # Discord blue color
-            }
-        )
-
-    # Create webhook payload
-    payload = {"content": f"📚 **Random sites collection** - {today}", "embeds": embeds}
-
-    # Send webhook using httpx
+    embeds = [
+        {
+            "title": f"Sites from {source}",
+            "description": "\n".join(f"• [{title}]({url})" for url, title in sites),
+            "color": DISCORD_EMBED_COLOR,
+        }
+        for source, sites in sites_by_source.items()
+    ]
+
+    # Split the embeds into messages that stay within Discord's per-message limits
+    batches = [[]]
+    batch_chars = 0
+    for embed in embeds:
+        embed_chars = len(embed["title"]) + len(embed["description"])
+        if batches[-1] and (
+            len(batches[-1]) == DISCORD_MAX_EMBEDS
+            or batch_chars + embed_chars > DISCORD_MAX_EMBED_CHARS
+        ):
+            batches.append([])
+            batch_chars = 0
+        batches[-1].append(embed)
+        batch_chars += embed_chars
+
+    # Send webhook using httpx, with the heading on the first message only
     try:
-        with httpx.Client(timeout=10.0) as client:
-            response = client.post(
-                webhook_url, json=payload, headers={"Content-Type": "application/json"}
-            )
+        for i, batch in enumerate(batches):
+            payload = {"embeds": batch}
+            if i == 0:
+                payload["content"] = f"📚 **Random sites collection** - {today}"
+            response = http_client.post(webhook_url, json=payload)
             response.raise_for_status()
-        logger.info("Discord webhook sent successfully")
+        logger.info(f"Discord webhook sent successfully ({len(batches)} messages)")
         return True
     except Exception as e:
         logger.error(f"Error sending Discord webhook: {e}")
         return False
 
 
+def file_sha256(path):
+    """Return the SHA-256 hex digest of a file, or None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 def download_db_from_cos():
     """Download the SQLite database from IBM Cloud Object Storage if it exists."""
     local_file_path = DB_FILENAME
+    tmp_file_path = local_file_path + ".tmp"
 
     try:
         # Check if file exists in COS
@@ -254,37 +313,85 @@ def download_db_from_cos():
 
         if file_exists:
             logger.info(f"Downloading database from COS bucket {COS_BUCKET_NAME}")
-            # Download the file
-            with open(local_file_path, "wb") as f:
-                cos_client.download_fileobj(COS_BUCKET_NAME, DB_FILENAME, f)
+            # Download to a temporary file and rename it into place, so an
+            # interrupted download never leaves a truncated database behind
+            with open(tmp_file_path, "wb") as f:
+                cos_client.download_fileobj(
+                    COS_BUCKET_NAME, DB_FILENAME, f, Config=TRANSFER_CONFIG
+                )
+            os.replace(tmp_file_path, local_file_path)
             logger.info(f"Database successfully downloaded to {local_file_path}")
         else:
+            # sqlite3 creates the file when the database is initialized
             logger.info(
                 "Database file does not exist in COS. A new one will be created locally."
             )
-            # Create empty file that will be initialized later
-            open(local_file_path, "a").close()
 
         return True
     except Exception as e:
         logger.error(f"Error downloading database from COS: {e}")
+        if os.path.exists(tmp_file_path):
+            os.remove(tmp_file_path)
         return False
 
 
 def upload_db_to_cos():
     """Upload the SQLite database to IBM Cloud Object Storage."""
     local_file_path = DB_FILENAME
+    snapshot_path = DB_FILENAME + ".upload"
 
     try:
+        # Upload a compacted copy without free pages, falling back to the live file
+        upload_path = local_file_path
+        try:
+            if os.path.exists(snapshot_path):
+                os.remove(snapshot_path)
+            get_db_connection().execute("VACUUM INTO ?", (snapshot_path,))
+            upload_path = snapshot_path
+            logger.debug(
+                f"Compacted database from {os.path.getsize(local_file_path)} "
+                f"to {os.path.getsize(snapshot_path)} bytes for upload"
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not compact database, uploading it as is: {e}")
+        finally:
+            close_db_connection()
+
         logger.info(f"Uploading database to COS bucket {COS_BUCKET_NAME}")
         # Upload the file
-        with open(local_file_path, "rb") as f:
-            cos_client.upload_fileobj(f, COS_BUCKET_NAME, DB_FILENAME)
+        with open(upload_path, "rb") as f:
+            cos_client.upload_fileobj(
+                f, COS_BUCKET_NAME, DB_FILENAME, Config=TRANSFER_CONFIG
+            )
         logger.info(f"Database successfully uploaded to COS bucket {COS_BUCKET_NAME}")
         return True
     except Exception as e:
         logger.error(f"Error uploading database to COS: {e}")
         return False
+    finally:
+        if os.path.exists(snapshot_path):
+            os.remove(snapshot_path)
+
+
+def download_hn_cache_from_cos():
+    """Download the Hacker News story cache left in COS by the previous run, if any."""
+    try:
+        cos_client.download_file(COS_BUCKET_NAME, HN_CACHE_FILENAME, HN_CACHE_FILENAME)
+        logger.debug("Downloaded Hacker News cache from COS")
+    except Exception as e:
+        # Without it every listed story is simply fetched again
+        logger.info(f"No Hacker News cache downloaded from COS: {e}")
+
+
+def upload_hn_cache_to_cos():
+    """Upload the Hacker News story cache to COS for the next run."""
+    if not os.path.exists(HN_CACHE_FILENAME):
+        return
+    try:
+        cos_client.upload_file(HN_CACHE_FILENAME, COS_BUCKET_NAME, HN_CACHE_FILENAME)
+        logger.debug("Uploaded Hacker News cache to COS")
+    except Exception as e:
+        logger.warning(f"Error uploading Hacker News cache to COS: {e}")
 
 
 def collect_unique_sites(local=False):
@@ -297,20 +404,37 @@ def collect_unique_sites(local=False):
             logger.error(
                 "Failed to download database from COS. Using/creating local database only."
             )
+        download_hn_cache_from_cos()
     else:
         logger.info("Running in local mode, skipping download from COS")
 
+    # Remember the starting contents so an unchanged database is not re-uploaded
+    original_db_hash = file_sha256(DB_FILENAME)
+
     # Initialize the enhanced database
     init_database_enhanced()
 
+    # Check candidate URLs against an in-memory copy instead of querying per URL
+    known_urls = load_known_urls()
+    logger.info(f"Loaded {len(known_urls)} known URLs from database")
+
     # Use the enhanced collection function
     collected_sites, markdown_content = collect_unique_sites_enhanced(
-        local=local, url_exists_func=url_exists, add_url_to_db_func=add_url_to_db
+        local=local,
+        url_exists_func=known_urls.__contains__,
+        add_urls_to_db_func=add_urls_to_db,
     )
 
+    # Close the connection so all changes are in the database file before uploading
+    close_db_connection()
+
     # After all operations, upload the updated database back to COS (skip if in local mode)
     if not local:
-        upload_db_to_cos()
+        if file_sha256(DB_FILENAME) == original_db_hash:
+            logger.info("Database unchanged, skipping upload to COS")
+        else:
+            upload_db_to_cos()
+        upload_hn_cache_to_cos()
     else:
         logger.info("Running in local mode, skipping upload to COS")
 
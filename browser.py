@@ -0,0 +1,64 @@
+import atexit
+import threading
+
+from playwright.sync_api import sync_playwright
+
+from logger import logger
+
+# Chromium switches that skip start-up work a headless scraper never uses
+BROWSER_LAUNCH_ARGS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--no-first-run",
+    "--no-default-browser-check",
+]
+
+# Playwright's sync API binds its objects to the thread that created them, so
+# each thread gets its own browser, launched on first use and reused for every
+# page visit made from that thread
+_browser_state = threading.local()
+
+
+def get_browser():
+    """Return this thread's headless Chromium browser, launching it on first use."""
+    browser = getattr(_browser_state, "browser", None)
+    if browser is None:
+        _browser_state.playwright = sync_playwright().start()
+        browser = _browser_state.playwright.chromium.launch(
+            headless=True, args=BROWSER_LAUNCH_ARGS
+        )
+        _browser_state.browser = browser
+        logger.debug("Launched shared browser")
+    return browser
+
+
+def close_browser():
+    """Close this thread's browser and stop its Playwright instance."""
+    browser = getattr(_browser_state, "browser", None)
+    if browser is not None:
+        browser.close()
+        _browser_state.playwright.stop()
+        _browser_state.browser = None
+        _browser_state.playwright = None
+        logger.debug("Closed shared browser")
+
+
+# Worker threads close their own browsers; this catches the main thread's
+# browser when a run ends early, e.g. on an exception or Ctrl-C
+atexit.register(close_browser)
+
+
+# Resource types that are never needed to read a page's URL, title or text
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "stylesheet"})
+
+
+def block_heavy_resources(route):
+    """Playwright route handler that aborts image, media, font and stylesheet requests."""
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        route.abort()
+    else:
+        route.continue_()
@@ -7,6 +7,7 @@ import sqlite3
 import os
 from datetime import datetime
 from tamga import Tamga
+from db import connect_db
 
 logger = Tamga(logToJSON=True, logToConsole=True)
 
@@ -32,7 +33,7 @@ def migrate_database_schema():
         shutil.copy2(db_path, backup_path)
         logger.info(f"Created database backup: {backup_path}")
 
-        conn = sqlite3.connect(db_path, detect_types=sqlite3.PARSE_DECLTYPES)
+        conn = connect_db(db_path)
         cursor = conn.cursor()
 
         # Check current schema
@@ -55,19 +56,46 @@ def migrate_database_schema():
             else:
                 logger.info(f"Column {column_name} already exists")
 
-        # Create index for blog analysis queries
+        # Create indexes for the English analysis and report queries
         try:
             cursor.execute(
                 """
-                CREATE INDEX IF NOT EXISTS idx_sites_blog_analysis
-                ON sites(source, has_blog, last_blog_check)
+                CREATE INDEX IF NOT EXISTS idx_sites_english_pending
+                ON sites(source, has_blog, last_blog_check, url, title)
+                WHERE has_blog IS NULL OR last_blog_check IS NULL
             """
             )
-            logger.info("Created blog analysis index")
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_sites_english_recent
+                ON sites(source, has_blog, last_blog_check, url, title)
+                WHERE has_blog = TRUE
+            """
+            )
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_sites_hn_recent
+                ON sites(capture_date, source, url, title)
+                WHERE source LIKE 'hackernews-%'
+            """
+            )
+            cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_sites_source_recent
+                ON sites(source, capture_date)
+            """
+            )
+            # The plain analysis index is covered by the partial indexes above
+            cursor.execute("DROP INDEX IF EXISTS idx_sites_blog_analysis")
+            cursor.execute("DROP INDEX IF EXISTS idx_sites_english_analysis")
+            logger.info("Created blog analysis indexes")
         except sqlite3.Error as e:
             logger.warning(f"Could not create index: {e}")
 
         conn.commit()
+
+        # Give the query planner statistics for the new indexes
+        conn.execute("ANALYZE")
         conn.close()
 
         logger.info("Database migration completed successfully")
@@ -81,7 +109,7 @@ def migrate_database_schema():
 def verify_migration():
     """Verify that the migration was successful."""
     try:
-        conn = sqlite3.connect("random_sites.db", detect_types=sqlite3.PARSE_DECLTYPES)
+        conn = connect_db()
         cursor = conn.cursor()
 
         # Check schema
@@ -128,7 +156,7 @@ def verify_migration():
 def init_database_enhanced():
     """Enhanced version of init_database with new schema."""
     logger.debug("Initializing enhanced database")
-    conn = sqlite3.connect("random_sites.db", detect_types=sqlite3.PARSE_DECLTYPES)
+    conn = connect_db()
     cursor = conn.cursor()
 
     # Check if the table exists
@@ -153,14 +181,6 @@ def init_database_enhanced():
         """
         )
 
-        # Create indexes
-        cursor.execute(
-            """
-            CREATE INDEX idx_sites_blog_analysis
-            ON sites(source, has_blog, last_blog_check)
-        """
-        )
-
         logger.info("Created new database with enhanced schema")
     else:
         # Check if source column exists (existing migration logic)
@@ -239,7 +259,7 @@ def analyze_existing_sites_for_blogs(limit=50):
     """Analyze existing 512kb sites that haven't been checked for blogs."""
     logger.info("Analyzing existing 512kb sites for blog content")
 
-    conn = sqlite3.connect("random_sites.db", detect_types=sqlite3.PARSE_DECLTYPES)
+    conn = connect_db()
     cursor = conn.cursor()
 
     # Get sites that need analysis
@@ -280,7 +300,7 @@ def generate_markdown_from_existing_data():
     """Generate markdown report from existing analyzed data."""
     logger.info("Generating markdown from existing data")
 
-    conn = sqlite3.connect("random_sites.db", detect_types=sqlite3.PARSE_DECLTYPES)
+    conn = connect_db()
     cursor = conn.cursor()
 
     # Get sites with blogs
@@ -0,0 +1,77 @@
+import atexit
+import sqlite3
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from logger import logger
+
+DB_FILENAME = "random_sites.db"
+
+# Shared connection, opened lazily so the database can be downloaded first
+_shared = SimpleNamespace(connection=None)
+
+# Per-connection tuning: a 64 MB page cache and in-memory temp tables. The
+# default rollback journal is kept on purpose: the webapp opens the uploaded
+# file straight from COS, and switching to WAL rewrites the file header, which
+# would make every run look like a change worth uploading
+DB_PRAGMAS = (
+    "PRAGMA cache_size = -65536",
+    "PRAGMA temp_store = MEMORY",
+)
+
+
+def connect_db(path: str = DB_FILENAME) -> sqlite3.Connection:
+    """Open a new SQLite connection with DB_PRAGMAS applied."""
+    conn = sqlite3.connect(path)
+    for pragma in DB_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def get_db_connection() -> sqlite3.Connection:
+    """Return the shared SQLite connection, opening it on first use.
+
+    The connection is in autocommit mode: writes go through write_transaction(),
+    so transaction boundaries are explicit rather than left to the sqlite3
+    module's implicit BEGIN.
+    """
+    if _shared.connection is None:
+        _shared.connection = connect_db()
+        _shared.connection.isolation_level = None
+        logger.debug(f"Opened database connection to {DB_FILENAME}")
+    return _shared.connection
+
+
+@contextmanager
+def write_transaction(conn: sqlite3.Connection):
+    """Run the enclosed writes in one BEGIN IMMEDIATE ... COMMIT transaction.
+
+    IMMEDIATE takes the write lock up front, so a batch cannot fail halfway
+    with SQLITE_BUSY when it upgrades from a read. Rolls back on any error.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.execute("COMMIT")
+    except BaseException:
+        # A failed COMMIT may already have ended the transaction
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+
+
+def close_db_connection():
+    """Close the shared SQLite connection, e.g. before uploading the database file."""
+    conn = _shared.connection
+    if conn is not None:
+        # Refresh query planner statistics, but only after writes: optimize
+        # rewrites sqlite_stat1 and would make an unchanged database look modified
+        if conn.total_changes:
+            conn.execute("PRAGMA optimize")
+        conn.close()
+        _shared.connection = None
+        logger.debug("Closed database connection")
+
+
+# Paths such as --analyze-english never close the connection explicitly
+atexit.register(close_db_connection)
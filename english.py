@@ -0,0 +1,246 @@
+import re
+import traceback
+from typing import Optional, Tuple
+
+from browser import block_heavy_resources, get_browser
+from logger import VERBOSE, logger
+
+
+def check_512kb_site_is_english(
+    url: str, title: str
+) -> Tuple[bool, Optional[str], str]:
+    """
+    Check if a 512kb site is in English and return basic site info.
+    Updated 2025-06-16: Simplified approach focusing on English detection instead of blog analysis.
+    """
+    logger.info(f"🔍 Checking if site is English: {url}")
+
+    try:
+        context = get_browser().new_context(
+            user_agent="Mozilla/5.0 (compatible; SiteChecker/1.0)"
+        )
+        try:
+            page = context.new_page()
+            # Only the DOM text is inspected, so skip images, fonts and CSS
+            page.route("**/*", block_heavy_resources)
+
+            # Set timeout and load page
+            page.set_default_timeout(10000)
+            logger.info(f"📄 Loading page: {url}")
+            page.goto(url, wait_until="domcontentloaded")
+            logger.info("✅ Page loaded successfully")
+
+            # Check if site is in English
+            is_english = detect_english_content(page, title)
+        finally:
+            context.close()
+
+        if is_english:
+            logger.info("✅ Site appears to be in English")
+            # Generate simple markdown entry for English site
+            markdown = f"## {title}\n\n- [{title}]({url})\n\n"
+            return True, markdown, "english_site"
+        else:
+            logger.info("❌ Site does not appear to be in English")
+            return False, None, "non_english"
+
+    except Exception as e:
+        logger.error(f"💥 Error checking {url}: {e}")
+        # Dead sites are common, so only pay for the traceback when it is shown
+        if VERBOSE:
+            logger.debug(f"Full traceback: {traceback.format_exc()}")
+        return False, None, "error"
+
+
+# Words that suggest English text, used by detect_english_content()
+ENGLISH_TITLE_WORDS = frozenset(
+    {
+        "the",
+        "and",
+        "or",
+        "but",
+        "in",
+        "on",
+        "at",
+        "to",
+        "for",
+        "of",
+        "with",
+        "by",
+        "about",
+        "home",
+        "page",
+        "blog",
+        "site",
+        "web",
+        "news",
+        "contact",
+        "portfolio",
+        "work",
+        "project",
+        "code",
+        "tech",
+        "development",
+        "design",
+        "digital",
+    }
+)
+ENGLISH_CONTENT_WORDS = frozenset(
+    {
+        "the",
+        "and",
+        "or",
+        "but",
+        "in",
+        "on",
+        "at",
+        "to",
+        "for",
+        "of",
+        "with",
+        "by",
+        "this",
+        "that",
+        "are",
+        "is",
+        "was",
+        "were",
+        "be",
+        "been",
+        "have",
+        "has",
+        "had",
+        "will",
+        "would",
+        "could",
+        "should",
+        "can",
+        "may",
+        "might",
+        "must",
+        "shall",
+        "about",
+        "after",
+        "before",
+        "during",
+        "through",
+        "over",
+        "under",
+        "above",
+        "home",
+        "page",
+        "site",
+        "website",
+        "blog",
+        "post",
+        "article",
+        "content",
+    }
+)
+ENGLISH_NAV_WORDS = frozenset(
+    {"home", "about", "contact", "blog", "work", "portfolio", "projects", "services"}
+)
+
+
+def word_pattern(words) -> re.Pattern:
+    """Compile a case-insensitive regex matching any of `words` as a whole word."""
+    alternatives = "|".join(map(re.escape, sorted(words, key=len, reverse=True)))
+    return re.compile(rf"\b(?:{alternatives})\b", re.IGNORECASE)
+
+
+ENGLISH_TITLE_RE = word_pattern(ENGLISH_TITLE_WORDS)
+ENGLISH_CONTENT_RE = word_pattern(ENGLISH_CONTENT_WORDS)
+ENGLISH_NAV_RE = word_pattern(ENGLISH_NAV_WORDS)
+
+
+def count_distinct_words(pattern: re.Pattern, text: str) -> int:
+    """Count how many different words from `pattern` appear in `text`."""
+    return len({match.lower() for match in pattern.findall(text)})
+
+
+# Collects everything detect_english_content() reads from the DOM in one
+# round trip: the lang attribute, a ~500 character text sample (first 3
+# elements per selector) and the text of the first 10 navigation links
+ENGLISH_PROBE_JS = """
+() => {
+    const texts = (selector, limit) =>
+        Array.from(document.querySelectorAll(selector), (e) => e.textContent)
+            .slice(0, limit)
+            .filter(Boolean);
+    let sample = "";
+    for (const selector of ["p", "h1", "h2", "h3", "nav", "main", "article"]) {
+        for (const text of texts(selector, 3)) {
+            sample += text + " ";
+            if (sample.length > 500) break;
+        }
+        if (sample.length > 500) break;
+    }
+    return {
+        lang: document.documentElement.getAttribute("lang"),
+        sample: sample,
+        nav: texts("nav a, .nav a, .menu a, header a", 10).join(" "),
+    };
+}
+"""
+
+
+def detect_english_content(page, title: str) -> bool:
+    """
+    Detect if a webpage content is primarily in English.
+    Updated 2025-06-16: New function for English detection.
+    """
+    logger.info("🔍 Starting English content detection...")
+
+    try:
+        # Check 1: Common English words in title, which needs nothing from the page
+        title_english_words = count_distinct_words(ENGLISH_TITLE_RE, title)
+
+        if title_english_words >= 2:
+            logger.info(f"✅ Found {title_english_words} English words in title")
+            return True
+
+        dom = page.evaluate(ENGLISH_PROBE_JS)
+
+        # Check 2: HTML lang attribute
+        lang_attr = dom["lang"]
+        if lang_attr and lang_attr.lower().startswith("en"):
+            logger.info(f"✅ Found English lang attribute: {lang_attr}")
+            return True
+
+        # Check 3: Navigation and common page elements
+        nav_english_count = count_distinct_words(ENGLISH_NAV_RE, dom["nav"])
+
+        if nav_english_count >= 2:
+            logger.info(f"✅ Found {nav_english_count} English navigation words")
+            return True
+
+        # Check 4: Page content sample
+        sample_text = dom["sample"]
+
+        # Check for English words in content
+        if sample_text:
+            english_word_count = count_distinct_words(ENGLISH_CONTENT_RE, sample_text)
+
+            # Calculate rough percentage
+            total_words = len(sample_text.split())
+            if total_words > 0:
+                english_percentage = (
+                    english_word_count / min(total_words, 50)
+                ) * 100  # Cap at 50 words for percentage calc
+                logger.info(
+                    f"English word analysis: {english_word_count} common English words, ~{english_percentage:.1f}% English"
+                )
+
+                if english_percentage >= 20:  # If at least 20% common English words
+                    logger.info(
+                        "✅ Content appears to be English based on word analysis"
+                    )
+                    return True
+
+        logger.info("❌ Site does not appear to be primarily English")
+        return False
+
+    except Exception as e:
+        logger.warning(f"Error detecting English content: {e}")
+        # Default to True if we can't determine (benefit of the doubt)
+        return True
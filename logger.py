@@ -0,0 +1,28 @@
+import os
+import threading
+
+from tamga import Tamga
+
+# Set VERBOSE=1 to keep DEBUG messages, which are dropped otherwise
+VERBOSE = os.getenv("VERBOSE") == "1"
+
+
+class LockedTamga(Tamga):
+    """Tamga logger that can be shared by worker threads.
+
+    Tamga rewrites its whole JSON log file on every call, so concurrent calls
+    (from this or any other instance) must not interleave, and DEBUG messages
+    are skipped unless VERBOSE is set.
+    """
+
+    _lock = threading.Lock()
+
+    def log(self, message: str, level: str, color: str) -> None:
+        if level == "DEBUG" and not VERBOSE:
+            return
+        with self._lock:
+            super().log(message, level, color)
+
+
+# Configure tamga logger
+logger = LockedTamga(logToJSON=True, logToConsole=True)
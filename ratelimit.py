@@ -0,0 +1,140 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from logger import logger
+
+# Longest pause taken on a server's say-so, so a bad header can't stall the run
+RATE_LIMIT_MAX_PAUSE = 60.0
+
+# Responses that mean the server is overloaded rather than that the request was bad
+OVERLOAD_STATUS_CODES = frozenset({429, 502, 503})
+
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` calls per second, in bursts of up to `burst`.
+
+    Callers only sleep when the bucket is empty, so an idle source is never delayed.
+    The rate adapts to server pressure: it is halved on every overload response
+    and grows back by a tenth of the configured rate on every success.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.max_rate = rate
+        self.min_rate = rate / 8
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, sleeping just long enough for one to become available."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            # Going negative reserves the next token, so concurrent callers queue up
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hold back the next caller (and everyone queued behind it) for `seconds`."""
+        with self._lock:
+            self._tokens = min(self._tokens, -seconds * self.rate)
+            self._updated = time.monotonic()
+
+    def observe(self, response: httpx.Response):
+        """Pause when a response says the server wants us to slow down.
+
+        Honors Retry-After on 429/503 responses, and pauses until the quota
+        resets once RateLimit-Remaining drops below 10% of RateLimit-Limit.
+        """
+        headers = response.headers
+        with self._lock:
+            if response.status_code in OVERLOAD_STATUS_CODES:
+                self.rate = max(self.min_rate, self.rate / 2)
+            elif response.is_success:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+        delay = 0.0
+        if response.status_code in (429, 503) and "Retry-After" in headers:
+            delay = parse_retry_after(headers["Retry-After"])
+        remaining = headers.get("RateLimit-Remaining")
+        limit = headers.get("RateLimit-Limit")
+        if remaining and limit:
+            try:
+                if int(remaining) < int(limit) * 0.1:
+                    delay = max(delay, float(headers.get("RateLimit-Reset", 1)))
+            except ValueError:
+                pass
+        if delay > 0:
+            delay = min(delay, RATE_LIMIT_MAX_PAUSE)
+            logger.warning(f"Rate limited by {response.url.host}, pausing {delay:.1f}s")
+            self.pause(delay)
+
+
+class CircuitBreaker:
+    """Stops calls to a failing service for a while instead of hammering it.
+
+    The breaker opens after `threshold` consecutive failures, and lets calls
+    through again once `cooldown` seconds have passed.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Return True if a call may be made."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.cooldown:
+                # Half-open: one more failure reopens the breaker straight away
+                self._opened_at = None
+                self._failures = self.threshold - 1
+                return True
+            return False
+
+    def record(self, ok: bool):
+        """Record the outcome of a call."""
+        with self._lock:
+            if ok:
+                self._failures = 0
+                return
+            self._failures += 1
+            if self._failures >= self.threshold and self._opened_at is None:
+                self._opened_at = time.monotonic()
+                logger.warning(
+                    f"{self._failures} consecutive failures, "
+                    f"pausing calls for {self.cooldown:.0f}s"
+                )
+
+
+def parse_retry_after(value: str) -> float:
+    """Seconds to wait for a Retry-After header given as seconds or an HTTP date."""
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def backoff_delay(consecutive_failures: int, base: float = 0.5, cap: float = 8.0):
+    """Exponential backoff with a little jitter: 0.5s, 1s, 2s, 4s, ... up to cap."""
+    return min(cap, base * 2 ** (consecutive_failures - 1)) + random.random() * 0.25
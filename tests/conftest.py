@@ -0,0 +1,18 @@
+import pytest
+from tamga import Tamga
+
+from db import close_db_connection
+
+
+@pytest.fixture(autouse=True)
+def no_json_log(monkeypatch):
+    # Keep Tamga from appending every test's log lines to tamga.json
+    monkeypatch.setattr(Tamga, "_writeToJSON", lambda self, message, level: None)
+
+
+@pytest.fixture
+def tmp_db(tmp_path, monkeypatch):
+    # The database files are opened relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    close_db_connection()
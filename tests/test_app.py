@@ -0,0 +1,201 @@
+import sqlite3
+
+import httpx
+import pytest
+
+import app
+from app import (
+    DISCORD_MAX_EMBED_CHARS,
+    DISCORD_MAX_EMBEDS,
+    add_urls_to_db,
+    init_database_enhanced,
+    load_known_urls,
+    send_discord_webhook,
+)
+from db import get_db_connection
+
+
+def index_names():
+    rows = get_db_connection().execute("PRAGMA index_list(sites)")
+    return {row[1] for row in rows}
+
+
+def test_init_creates_indexes(tmp_db):
+    init_database_enhanced()
+    assert {
+        "idx_sites_english_pending",
+        "idx_sites_english_recent",
+        "idx_sites_hn_recent",
+        "idx_sites_source_recent",
+    } <= index_names()
+
+
+def test_init_drops_superseded_indexes(tmp_db):
+    init_database_enhanced()
+    conn = get_db_connection()
+    conn.execute("CREATE INDEX idx_sites_capture_date ON sites(capture_date)")
+    conn.execute("CREATE INDEX idx_sites_english_analysis ON sites(source, has_blog)")
+
+    init_database_enhanced()
+    names = index_names()
+    assert "idx_sites_capture_date" not in names
+    assert "idx_sites_english_analysis" not in names
+
+
+def create_legacy_sites(rows):
+    # Databases from before the UNIQUE constraint on url
+    with sqlite3.connect("random_sites.db") as conn:
+        conn.execute(
+            "CREATE TABLE sites (id INTEGER PRIMARY KEY, url TEXT, title TEXT, capture_date TEXT)"
+        )
+        conn.executemany("INSERT INTO sites (url, title) VALUES (?, ?)", rows)
+    conn.close()
+
+
+def test_init_adds_unique_url_index(tmp_db):
+    create_legacy_sites([("https://a.example", "A")])
+    init_database_enhanced()
+
+    assert "idx_sites_url" in index_names()
+    assert add_urls_to_db([("https://a.example", "A", "512kb.club")]) == 0
+
+
+def test_init_keeps_going_with_duplicate_urls(tmp_db):
+    create_legacy_sites([("https://a.example", "A"), ("https://a.example", "A")])
+    init_database_enhanced()
+
+    assert "idx_sites_url" not in index_names()
+    assert "has_blog" in {
+        row[1] for row in get_db_connection().execute("PRAGMA table_info(sites)")
+    }
+
+
+def test_add_urls_counts_only_new_rows(tmp_db):
+    init_database_enhanced()
+    assert add_urls_to_db([("https://a.example", "A", "512kb.club")]) == 1
+
+    rows = [
+        ("https://a.example", "A again", "512kb.club"),
+        ("https://b.example", "B", "hackernews-show"),
+        ("https://b.example", "B again", "hackernews-new"),
+    ]
+    assert add_urls_to_db(rows) == 1
+    assert load_known_urls() == {"https://a.example", "https://b.example"}
+
+
+def test_add_urls_with_no_rows(tmp_db):
+    init_database_enhanced()
+    assert add_urls_to_db([]) == 0
+
+
+@pytest.fixture
+def webhook(monkeypatch):
+    monkeypatch.setenv("DISCORD_WEBHOOK_URL", "https://discord.example.com/hook")
+    payloads = []
+
+    def post(url, json):
+        payloads.append(json)
+        return httpx.Response(204, request=httpx.Request("POST", url))
+
+    monkeypatch.setattr(app.http_client, "post", post)
+    return payloads
+
+
+def embed_chars(embed):
+    return len(embed["title"]) + len(embed["description"])
+
+
+def test_single_message(webhook):
+    sites = [
+        ("https://a.example", "A", "512kb.club"),
+        ("https://b.example", "B", "hackernews-show"),
+    ]
+    assert send_discord_webhook(sites)
+
+    assert len(webhook) == 1
+    assert "Random sites collection" in webhook[0]["content"]
+    assert [embed["title"] for embed in webhook[0]["embeds"]] == [
+        "Sites from 512kb.club",
+        "Sites from hackernews-show",
+    ]
+
+
+def test_splits_at_max_embeds(webhook):
+    sites = [(f"https://{i}.example", f"Site {i}", f"source-{i}") for i in range(25)]
+    assert send_discord_webhook(sites)
+
+    assert [len(payload["embeds"]) for payload in webhook] == [
+        DISCORD_MAX_EMBEDS,
+        DISCORD_MAX_EMBEDS,
+        5,
+    ]
+
+
+def test_splits_at_max_embed_chars(webhook):
+    # Each source makes an embed of roughly 2500 characters
+    sites = [
+        (
+            f"https://example.com/{source}/{i}/{'x' * 100}",
+            f"Post {i}",
+            f"source-{source}",
+        )
+        for source in range(5)
+        for i in range(20)
+    ]
+    assert send_discord_webhook(sites)
+
+    assert len(webhook) > 1
+    for payload in webhook:
+        assert sum(map(embed_chars, payload["embeds"])) <= DISCORD_MAX_EMBED_CHARS
+    assert sum(len(payload["embeds"]) for payload in webhook) == 5
+
+
+def test_heading_on_first_message_only(webhook):
+    sites = [(f"https://{i}.example", f"Site {i}", f"source-{i}") for i in range(15)]
+    assert send_discord_webhook(sites)
+
+    assert "content" in webhook[0]
+    assert all("content" not in payload for payload in webhook[1:])
+
+
+def test_missing_webhook_url(webhook, monkeypatch):
+    monkeypatch.delenv("DISCORD_WEBHOOK_URL")
+    assert not send_discord_webhook([("https://a.example", "A", "512kb.club")])
+    assert webhook == []
+
+
+def test_failed_post(monkeypatch):
+    monkeypatch.setenv("DISCORD_WEBHOOK_URL", "https://discord.example.com/hook")
+
+    def post(url, json):
+        return httpx.Response(429, request=httpx.Request("POST", url))
+
+    monkeypatch.setattr(app.http_client, "post", post)
+    assert not send_discord_webhook([("https://a.example", "A", "512kb.club")])
+
+
+class FakeCOS:
+    """Records uploads and fails downloads, like a bucket without the object."""
+
+    def __init__(self):
+        self.uploaded = []
+
+    def download_file(self, bucket, key, filename):
+        raise RuntimeError("404 Not Found")
+
+    def upload_file(self, filename, bucket, key):
+        self.uploaded.append(key)
+
+
+def test_hn_cache_transfer(tmp_db, monkeypatch):
+    cos = FakeCOS()
+    monkeypatch.setattr(app, "cos_client", cos)
+
+    # A missing cache in COS is not an error, and there is nothing to upload
+    app.download_hn_cache_from_cos()
+    app.upload_hn_cache_to_cos()
+    assert cos.uploaded == []
+
+    (tmp_db / app.HN_CACHE_FILENAME).touch()
+    app.upload_hn_cache_to_cos()
+    assert cos.uploaded == [app.HN_CACHE_FILENAME]
@@ -0,0 +1,25 @@
+import pytest
+
+from db import get_db_connection, write_transaction
+
+
+def test_write_transaction_commits(tmp_db):
+    conn = get_db_connection()
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    with write_transaction(conn):
+        conn.execute("INSERT INTO t VALUES (1)")
+
+    assert not conn.in_transaction
+    assert conn.execute("SELECT x FROM t").fetchall() == [(1,)]
+
+
+def test_write_transaction_rolls_back_on_error(tmp_db):
+    conn = get_db_connection()
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    with pytest.raises(RuntimeError):
+        with write_transaction(conn):
+            conn.execute("INSERT INTO t VALUES (1)")
+            raise RuntimeError("boom")
+
+    assert not conn.in_transaction
+    assert conn.execute("SELECT x FROM t").fetchall() == []
@@ -0,0 +1,63 @@
+from english import (
+    ENGLISH_CONTENT_RE,
+    ENGLISH_NAV_RE,
+    ENGLISH_TITLE_RE,
+    count_distinct_words,
+    detect_english_content,
+)
+
+
+class FakePage:
+    """Stands in for a Playwright page, returning a fixed DOM probe result."""
+
+    def __init__(self, lang=None, sample="", nav=""):
+        self.dom = {"lang": lang, "sample": sample, "nav": nav}
+        self.evaluated = 0
+
+    def evaluate(self, script):
+        self.evaluated += 1
+        return self.dom
+
+
+def test_count_distinct_words_counts_each_word_once():
+    assert (
+        count_distinct_words(ENGLISH_TITLE_RE, "The cat and the dog and THE bird") == 2
+    )
+
+
+def test_count_distinct_words_matches_whole_words_only():
+    # "there" contains "the", "orange" contains "or"
+    assert count_distinct_words(ENGLISH_TITLE_RE, "there orange band") == 0
+
+
+def test_count_distinct_words_nav():
+    assert count_distinct_words(ENGLISH_NAV_RE, "Home | About | Blog | home") == 3
+
+
+def test_count_distinct_words_content_empty():
+    assert count_distinct_words(ENGLISH_CONTENT_RE, "") == 0
+
+
+def test_title_is_checked_before_the_page():
+    page = FakePage()
+    assert detect_english_content(page, "Notes on the web and more")
+    assert page.evaluated == 0
+
+
+def test_lang_attribute():
+    page = FakePage(lang="en-GB")
+    assert detect_english_content(page, "Zettelkasten")
+    assert page.evaluated == 1
+
+
+def test_navigation_words():
+    assert detect_english_content(FakePage(lang="de", nav="Home About"), "Notizen")
+
+
+def test_not_english():
+    page = FakePage(
+        lang="fr",
+        sample="Bienvenue sur mon site personnel, je partage mes notes",
+        nav="Accueil Projets",
+    )
+    assert not detect_english_content(page, "Carnet")
@@ -0,0 +1,212 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+import ratelimit
+from ratelimit import (
+    RATE_LIMIT_MAX_PAUSE,
+    CircuitBreaker,
+    RateLimiter,
+    parse_retry_after,
+)
+
+
+def make_response(status_code, headers=None):
+    request = httpx.Request("GET", "https://api.example.com/items")
+    return httpx.Response(status_code, headers=headers, request=request)
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = RateLimiter(10, burst=10)
+    pauses = []
+    monkeypatch.setattr(limiter, "pause", pauses.append)
+    limiter.pauses = pauses
+    return limiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(ratelimit.time, "sleep", sleeps.append)
+    return sleeps
+
+
+def test_acquire_sleeps_only_when_bucket_is_empty(clock, sleeps):
+    limiter = RateLimiter(10, burst=2)
+    limiter.acquire()
+    limiter.acquire()
+    assert sleeps == []
+
+    limiter.acquire()
+    assert sleeps == [pytest.approx(0.1)]
+
+
+def test_acquire_refills_over_time(clock, sleeps):
+    limiter = RateLimiter(10, burst=2)
+    limiter.acquire()
+    limiter.acquire()
+
+    clock[0] += 0.2
+    limiter.acquire()
+    limiter.acquire()
+    assert sleeps == []
+
+
+def test_acquire_queues_concurrent_callers(clock, sleeps):
+    limiter = RateLimiter(2)
+    for _ in range(3):
+        limiter.acquire()
+    assert sleeps == [pytest.approx(0.5), pytest.approx(1.0)]
+
+
+def test_parse_retry_after_seconds():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("1.5") == 1.5
+
+
+def test_parse_retry_after_negative_seconds():
+    assert parse_retry_after("-5") == 0.0
+
+
+def test_parse_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert parse_retry_after(format_datetime(retry_at, usegmt=True)) == pytest.approx(
+        30, abs=2
+    )
+
+
+def test_parse_retry_after_past_http_date():
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_parse_retry_after_garbage():
+    assert parse_retry_after("soon") == 0.0
+    assert parse_retry_after("") == 0.0
+
+
+def test_observe_retry_after_on_429(limiter):
+    limiter.observe(make_response(429, {"Retry-After": "5"}))
+    assert limiter.pauses == [5.0]
+
+
+def test_observe_retry_after_as_http_date_on_503(limiter):
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=20)
+    limiter.observe(
+        make_response(503, {"Retry-After": format_datetime(retry_at, usegmt=True)})
+    )
+    assert len(limiter.pauses) == 1
+    assert limiter.pauses[0] == pytest.approx(20, abs=2)
+
+
+def test_observe_ignores_retry_after_on_success(limiter):
+    limiter.observe(make_response(200, {"Retry-After": "5"}))
+    assert limiter.pauses == []
+
+
+def test_observe_caps_long_pauses(limiter):
+    limiter.observe(make_response(429, {"Retry-After": "3600"}))
+    assert limiter.pauses == [RATE_LIMIT_MAX_PAUSE]
+
+
+def test_observe_pauses_when_quota_nearly_used(limiter):
+    headers = {
+        "RateLimit-Limit": "100",
+        "RateLimit-Remaining": "9",
+        "RateLimit-Reset": "7",
+    }
+    limiter.observe(make_response(200, headers))
+    assert limiter.pauses == [7.0]
+
+
+def test_observe_keeps_going_with_quota_left(limiter):
+    headers = {
+        "RateLimit-Limit": "100",
+        "RateLimit-Remaining": "10",
+        "RateLimit-Reset": "7",
+    }
+    limiter.observe(make_response(200, headers))
+    assert limiter.pauses == []
+
+
+def test_observe_ignores_malformed_quota_headers(limiter):
+    headers = {"RateLimit-Limit": "lots", "RateLimit-Remaining": "1"}
+    limiter.observe(make_response(200, headers))
+    assert limiter.pauses == []
+
+
+def test_observe_halves_rate_on_overload_and_recovers(limiter):
+    limiter.observe(make_response(502))
+    assert limiter.rate == 5
+
+    for _ in range(10):
+        limiter.observe(make_response(503))
+    assert limiter.rate == limiter.min_rate
+
+    for _ in range(20):
+        limiter.observe(make_response(200))
+    assert limiter.rate == limiter.max_rate
+
+
+def test_pause_delays_next_acquire(sleeps):
+    limiter = RateLimiter(10, burst=1)
+
+    limiter.pause(2)
+    limiter.acquire()
+    assert len(sleeps) == 1
+    assert sleeps[0] == pytest.approx(2.1, abs=0.05)
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(threshold=3, cooldown=30)
+    for _ in range(2):
+        breaker.record(False)
+    assert breaker.allow()
+
+    breaker.record(False)
+    assert not breaker.allow()
+
+
+def test_breaker_success_resets_failure_count(clock):
+    breaker = CircuitBreaker(threshold=3, cooldown=30)
+    breaker.record(False)
+    breaker.record(False)
+    breaker.record(True)
+    breaker.record(False)
+    assert breaker.allow()
+
+
+def test_breaker_half_open_failure_reopens(clock):
+    breaker = CircuitBreaker(threshold=3, cooldown=30)
+    for _ in range(3):
+        breaker.record(False)
+
+    clock[0] += 29
+    assert not breaker.allow()
+
+    clock[0] += 1
+    assert breaker.allow()
+    breaker.record(False)
+    assert not breaker.allow()
+
+
+def test_breaker_half_open_success_closes(clock):
+    breaker = CircuitBreaker(threshold=3, cooldown=30)
+    for _ in range(3):
+        breaker.record(False)
+
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record(True)
+    breaker.record(False)
+    breaker.record(False)
+    assert breaker.allow()
@@ -0,0 +1,91 @@
+import itertools
+import threading
+
+import pytest
+
+import utils
+from utils import collect_512kb_sites, load_hn_items, save_hn_items
+
+
+@pytest.fixture
+def kb_sites(monkeypatch):
+    """Fake 512kb.club sites; every third one is not English."""
+    fetched = []
+    numbers = itertools.count()
+    lock = threading.Lock()
+
+    def get_random_site():
+        with lock:
+            n = next(numbers)
+            fetched.append(n)
+        return f"https://{n}.example", f"Site {n}"
+
+    def check_512kb_site_is_english(url, title):
+        n = int(url.split("//")[1].split(".")[0])
+        is_english = n % 3 != 2
+        return is_english, None, "english" if is_english else "not_english"
+
+    monkeypatch.setattr(utils, "get_random_site", get_random_site)
+    monkeypatch.setattr(
+        utils, "check_512kb_site_is_english", check_512kb_site_is_english
+    )
+    monkeypatch.setattr(utils, "close_browser", lambda: None)
+    return fetched
+
+
+def test_collect_512kb_stops_at_count(kb_sites):
+    sites, english_sites, english_results = collect_512kb_sites(5, 20)
+
+    # Attempts are reserved before they start, so no worker fetches a site
+    # that would no longer be needed
+    assert len(kb_sites) == 5
+    assert len(sites) == 5
+    assert len(english_results) == 5
+    assert english_sites == [
+        site
+        for site, (_, is_english, _, _) in zip(sites, english_results)
+        if is_english
+    ]
+
+
+def test_collect_512kb_skips_known_urls(kb_sites):
+    sites, _, _ = collect_512kb_sites(5, 20, url_exists_func=lambda url: True)
+
+    assert len(kb_sites) == 20
+    assert sites == []
+
+
+def test_collect_512kb_counts_failed_attempts(kb_sites, monkeypatch):
+    monkeypatch.setattr(utils.time, "sleep", lambda seconds: None)
+
+    def get_random_site():
+        kb_sites.append(None)
+        raise RuntimeError("landing page timed out")
+
+    monkeypatch.setattr(utils, "get_random_site", get_random_site)
+    sites, _, _ = collect_512kb_sites(5, 8)
+
+    assert len(kb_sites) == 8
+    assert sites == []
+
+
+def test_hn_cache_round_trip(tmp_db):
+    save_hn_items({1: {"url": "https://a.example", "title": "A"}})
+    assert load_hn_items() == {1: {"url": "https://a.example", "title": "A"}}
+
+
+def test_hn_cache_drops_expired_items(tmp_db, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(utils.time, "time", lambda: now[0])
+    save_hn_items({1: {"url": "https://a.example", "title": "A"}})
+
+    now[0] += utils.HN_ITEM_TTL
+    assert load_hn_items() == {}
+
+    save_hn_items({2: {"url": "https://b.example", "title": "B"}})
+    assert load_hn_items() == {2: {"url": "https://b.example", "title": "B"}}
+
+
+def test_hn_cache_stays_out_of_the_sites_database(tmp_db):
+    save_hn_items({1: {"url": "https://a.example", "title": "A"}})
+    assert not (tmp_db / "random_sites.db").exists()
@@ -1,76 +1,207 @@
 #!/usr/bin/env python3
+import atexit
 import os
+import queue
 import time
 import random
 import httpx
-import re
 import sqlite3
-from tamga import Tamga
-from playwright.sync_api import sync_playwright
+import re
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from itertools import chain, islice
 from datetime import datetime, date
 from urllib.parse import urljoin, urlparse
 from typing import List, Tuple, Optional, Dict
 
-# Configure tamga logger
-logger = Tamga(logToJSON=True, logToConsole=True)
+from browser import block_heavy_resources, close_browser, get_browser
+from db import get_db_connection, write_transaction
+from english import check_512kb_site_is_english
+from logger import VERBOSE, logger
+from ratelimit import CircuitBreaker, OVERLOAD_STATUS_CODES, RateLimiter, backoff_delay
+
+# Shared HTTP client so repeated API and webhook calls reuse keep-alive
+# connections instead of paying a new TLS handshake each time
+http_client = httpx.Client(timeout=10.0)
+atexit.register(http_client.close)
 
 # =============================================================================
-# EXISTING FUNCTIONS (UNCHANGED)
+# SHARED RATE LIMITERS
 # =============================================================================
 
+# Hacker News API requests, shared by the show and new story workers. The
+# Firebase API is built for fan-out, so allow short bursts of parallel requests
+hn_limiter = RateLimiter(10, burst=10)
+hn_breaker = CircuitBreaker()
+
+# Linkwarden API requests; a self-hosted instance may enforce its own quota
+linkwarden_limiter = RateLimiter(2, burst=2)
+
+# Concurrent story detail requests per story list
+HN_DETAIL_WORKERS = 10
+
+
+# =============================================================================
+# RANDOM SITE AND API SOURCES
+# =============================================================================
+
+
+# Landing page, "random" link selector and rate limiter for the landing host
+RANDOM_SITE_SOURCES = {
+    "512kb.club": ("https://512kb.club", "a.button.random", RateLimiter(0.5)),
+    "indieblog.page": ("https://indieblog.page/", "a#stumble", RateLimiter(1)),
+}
+
+# Cap on any single Playwright wait while fetching a random site
+RANDOM_SITE_TIMEOUT_MS = 8000
 
-def get_random_site():
-    """Get a random site from 512kb.club and return its URL and title."""
-    logger.debug("Getting random site from 512kb.club")
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
-        page = context.new_page()
-        page.goto("https://512kb.club")
+
+def fetch_random(landing_url, trigger_selector, limiter=None):
+    """
+    Follow a site's "random" link and return the URL and title it opens.
+
+    Args:
+        landing_url: Page hosting the random link
+        trigger_selector: CSS selector of the link that opens a random site
+        limiter: Optional RateLimiter for visits to the landing host
+
+    Returns:
+        Tuple of (url, title)
+    """
+    logger.debug(f"Getting random site from {landing_url}")
+    context = get_browser().new_context()
+    context.set_default_timeout(RANDOM_SITE_TIMEOUT_MS)
+    context.route("**/*", block_heavy_resources)
+    page = context.new_page()
+    new_page = None
+    try:
+        if limiter is not None:
+            limiter.acquire()
+        page.goto(landing_url)
 
         # Set up event listener for new pages before clicking
         with context.expect_page() as new_page_info:
-            # Click the random button
-            page.click("a.button.random")
+            page.click(trigger_selector)
 
         # Get the new page that was opened
         new_page = new_page_info.value
-        new_page.wait_for_load_state("networkidle")
+        new_page.wait_for_load_state("domcontentloaded")
 
         # Grab the URL and title of the new page
         random_url = new_page.url
         title = new_page.title()
+    finally:
+        # Close pages before the context so Chromium frees them immediately
+        if new_page is not None:
+            new_page.close()
+        page.close()
+        context.close()
+
+    logger.debug(f"Retrieved random site: {random_url}")
+    return random_url, title
+
 
-        browser.close()
-        logger.debug(f"Retrieved random site: {random_url}")
-        return random_url, title
+def get_random_site():
+    """Get a random site from 512kb.club and return its URL and title."""
+    return fetch_random(*RANDOM_SITE_SOURCES["512kb.club"])
 
 
 def get_random_indieblog():
     """Get a random site from indieblog.page and return its URL and title."""
-    logger.debug("Getting random site from indieblog.page")
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
-        page = context.new_page()
-        page.goto("https://indieblog.page/")
+    return fetch_random(*RANDOM_SITE_SOURCES["indieblog.page"])
 
-        # Set up event listener for new pages before clicking
-        with context.expect_page() as new_page_info:
-            # Click the random button using the correct selector from HTML
-            page.click("a#stumble")
 
-        # Get the new page that was opened
-        new_page = new_page_info.value
-        new_page.wait_for_load_state("networkidle")
+# Stories fetched within the last day are reused, as the story lists overlap
+# heavily between runs. They are cached in their own small database next to
+# random_sites.db, which is uploaded to COS and served by the webapp and should
+# only change when sites are added
+HN_CACHE_FILENAME = "hn_cache.db"
+HN_ITEM_TTL = 24 * 60 * 60
 
-        # Grab the URL and title of the new page
-        random_url = new_page.url
-        title = new_page.title()
 
-        browser.close()
-        logger.debug(f"Retrieved random site: {random_url}")
-        return random_url, title
+def open_hn_cache() -> sqlite3.Connection:
+    """Open the Hacker News cache database, creating its table on first use."""
+    conn = sqlite3.connect(HN_CACHE_FILENAME)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS hn_items (
+            id INTEGER PRIMARY KEY,
+            url TEXT,
+            title TEXT,
+            fetched REAL
+        )
+    """
+    )
+    return conn
+
+
+def load_hn_items() -> Dict[int, Dict]:
+    """Load the Hacker News stories fetched within the last day, keyed by story ID."""
+    try:
+        with closing(open_hn_cache()) as conn:
+            rows = conn.execute(
+                "SELECT id, url, title FROM hn_items WHERE fetched > ?",
+                (time.time() - HN_ITEM_TTL,),
+            ).fetchall()
+    except sqlite3.Error as e:
+        logger.warning(f"Could not read Hacker News cache: {e}")
+        return {}
+    return {story_id: {"url": url, "title": title} for story_id, url, title in rows}
+
+
+def save_hn_items(items: Dict[int, Dict]):
+    """Store newly fetched Hacker News stories and drop those older than a day."""
+    now = time.time()
+    try:
+        with closing(open_hn_cache()) as conn:
+            with conn:
+                conn.execute(
+                    "DELETE FROM hn_items WHERE fetched <= ?", (now - HN_ITEM_TTL,)
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO hn_items (id, url, title, fetched) "
+                    "VALUES (?, ?, ?, ?)",
+                    (
+                        (story_id, story["url"], story["title"], now)
+                        for story_id, story in items.items()
+                    ),
+                )
+    except sqlite3.Error as e:
+        logger.warning(f"Could not write Hacker News cache: {e}")
+
+
+def fetch_hn_story_ids(url: str) -> List[int]:
+    """Fetch a Hacker News story ID list."""
+    hn_limiter.acquire()
+    response = http_client.get(url)
+    hn_limiter.observe(response)
+    response.raise_for_status()
+    return response.json()
+
+
+def get_cached_hackernews_story_details(
+    story_ids: List[int], story_cache: Dict[int, Dict]
+) -> List[Optional[Dict]]:
+    """Story details for each ID, fetching only the stories missing from `story_cache`.
+
+    Newly fetched stories are added to `story_cache`.
+    """
+    missing = [story_id for story_id in story_ids if story_id not in story_cache]
+    logger.debug(
+        f"{len(story_ids) - len(missing)} stories cached, fetching {len(missing)}"
+    )
+    if missing:
+        # Fetch concurrently; map() keeps the ranking order
+        with ThreadPoolExecutor(max_workers=HN_DETAIL_WORKERS) as executor:
+            fetched = list(executor.map(get_hackernews_story_details, missing))
+
+        for story_id, story in zip(missing, fetched):
+            if story:
+                story_cache[story_id] = {"url": story["url"], "title": story["title"]}
+
+    return [story_cache.get(story_id) for story_id in story_ids]
 
 
 def get_hackernews_story_ids(story_type):
@@ -91,12 +222,9 @@ def get_hackernews_story_ids(story_type):
         raise ValueError(f"Invalid story type: {story_type}, only 'show' is supported")
 
     try:
-        with httpx.Client(timeout=10.0) as client:
-            response = client.get(url)
-            response.raise_for_status()
-            story_ids = response.json()
-            logger.debug(f"Retrieved {len(story_ids)} {story_type} story IDs")
-            return story_ids
+        story_ids = fetch_hn_story_ids(url)
+        logger.debug(f"Retrieved {len(story_ids)} {story_type} story IDs")
+        return story_ids
     except Exception as e:
         logger.error(f"Error fetching Hacker News {story_type} story IDs: {e}")
         return []
@@ -115,18 +243,28 @@ def get_hackernews_story_details(story_id):
     logger.debug(f"Fetching details for story {story_id}")
     url = f"https://hacker-news.firebaseio.com/v0/item/{story_id}.json"
 
-    try:
-        with httpx.Client(timeout=10.0) as client:
-            response = client.get(url)
-            response.raise_for_status()
-            story = response.json()
-
-            # Check if it's a valid story with a URL and title
-            if not story or "url" not in story or "title" not in story:
-                logger.warning(f"Story {story_id} is missing URL or title")
-                return None
+    if not hn_breaker.allow():
+        logger.debug(f"Skipping story {story_id}, Hacker News API is failing")
+        return None
 
-            return story
+    try:
+        hn_limiter.acquire()
+        response = http_client.get(url)
+        hn_limiter.observe(response)
+        hn_breaker.record(response.status_code not in OVERLOAD_STATUS_CODES)
+        response.raise_for_status()
+        story = response.json()
+
+        # Check if it's a valid story with a URL and title
+        if not story or "url" not in story or "title" not in story:
+            logger.warning(f"Story {story_id} is missing URL or title")
+            return None
+
+        return story
+    except httpx.TransportError as e:
+        hn_breaker.record(False)
+        logger.error(f"Error fetching story {story_id} details: {e}")
+        return None
     except Exception as e:
         logger.error(f"Error fetching story {story_id} details: {e}")
         return None
@@ -156,45 +294,46 @@ def get_random_linkwarden_links(api_url, api_key, count=10, url_exists_func=None
 
     try:
         # Fetch all bookmarks from Linkwarden
-        with httpx.Client(timeout=30.0) as client:
-            logger.debug(f"Making request to Linkwarden API: {full_url}")
-            response = client.get(full_url, headers=headers)
+        logger.debug(f"Making request to Linkwarden API: {full_url}")
+        linkwarden_limiter.acquire()
+        response = http_client.get(full_url, headers=headers, timeout=30.0)
+        linkwarden_limiter.observe(response)
 
-            # Debug information on response
-            logger.debug(f"Linkwarden API response status: {response.status_code}")
-            if response.status_code != 200:
-                logger.error(f"Linkwarden API error: {response.text}")
+        # Debug information on response
+        logger.debug(f"Linkwarden API response status: {response.status_code}")
+        if response.status_code != 200:
+            logger.error(f"Linkwarden API error: {response.text}")
 
-            response.raise_for_status()
-            all_links = response.json()
+        response.raise_for_status()
+        all_links = response.json()
 
-            logger.debug(f"Retrieved {len(all_links)} total links from Linkwarden")
+        logger.debug(f"Retrieved {len(all_links)} total links from Linkwarden")
 
-            # Filter out links that don't have URLs or titles
-            valid_links = [
-                link for link in all_links if link.get("url") and link.get("title")
-            ]
+        # Filter out links that don't have URLs or titles
+        valid_links = [
+            link for link in all_links if link.get("url") and link.get("title")
+        ]
 
-            # If we don't have enough links, return all we have
-            if len(valid_links) <= count:
-                selected_links = valid_links
-            else:
-                # Otherwise, get a random sample
-                selected_links = random.sample(valid_links, count)
+        # If we don't have enough links, return all we have
+        if len(valid_links) <= count:
+            selected_links = valid_links
+        else:
+            # Otherwise, get a random sample
+            selected_links = random.sample(valid_links, count)
 
-            results = []
-            for link in selected_links:
-                url = link.get("url")
-                title = link.get("title")
+        results = []
+        for link in selected_links:
+            url = link.get("url")
+            title = link.get("title")
 
-                # Check if this URL already exists in our database
-                if url_exists_func is None or not url_exists_func(url):
-                    results.append((url, title, "linkwarden"))
-                else:
-                    logger.debug(f"Link URL already in database: {url}")
+            # Check if this URL already exists in our database
+            if url_exists_func is None or not url_exists_func(url):
+                results.append((url, title, "linkwarden"))
+            else:
+                logger.debug(f"Link URL already in database: {url}")
 
-            logger.info(f"Retrieved {len(results)} unique random links from Linkwarden")
-            return results
+        logger.info(f"Retrieved {len(results)} unique random links from Linkwarden")
+        return results
 
     except Exception as e:
         logger.error(f"Error fetching links from Linkwarden: {e}")
@@ -207,230 +346,10 @@ def get_random_linkwarden_links(api_url, api_key, count=10, url_exists_func=None
 # =============================================================================
 
 
-def check_512kb_site_is_english(
-    url: str, title: str
-) -> Tuple[bool, Optional[str], str]:
-    """
-    Check if a 512kb site is in English and return basic site info.
-    Updated 2025-06-16: Simplified approach focusing on English detection instead of blog analysis.
-    """
-    logger.info(f"🔍 Checking if site is English: {url}")
-
-    try:
-        with sync_playwright() as p:
-            logger.info("🌐 Launching browser...")
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                user_agent="Mozilla/5.0 (compatible; SiteChecker/1.0)"
-            )
-            page = context.new_page()
-
-            # Set timeout and load page
-            page.set_default_timeout(10000)
-            logger.info(f"📄 Loading page: {url}")
-            page.goto(url, wait_until="networkidle")
-            logger.info("✅ Page loaded successfully")
-
-            # Check if site is in English
-            is_english = detect_english_content(page, title)
-
-            if is_english:
-                logger.info("✅ Site appears to be in English")
-                # Generate simple markdown entry for English site
-                markdown = f"## {title}\n\n- [{title}]({url})\n\n"
-                browser.close()
-                return True, markdown, "english_site"
-            else:
-                logger.info("❌ Site does not appear to be in English")
-                browser.close()
-                return False, None, "non_english"
-
-    except Exception as e:
-        logger.error(f"💥 Error checking {url}: {e}")
-        import traceback
-
-        logger.error(f"Full traceback: {traceback.format_exc()}")
-        return False, None, "error"
-
-
-def detect_english_content(page, title: str) -> bool:
-    """
-    Detect if a webpage content is primarily in English.
-    Updated 2025-06-16: New function for English detection.
-    """
-    logger.info("🔍 Starting English content detection...")
-
-    try:
-        # Check 1: HTML lang attribute
-        html_element = page.query_selector("html")
-        if html_element:
-            lang_attr = html_element.get_attribute("lang")
-            if lang_attr and lang_attr.lower().startswith("en"):
-                logger.info(f"✅ Found English lang attribute: {lang_attr}")
-                return True
-
-        # Check 2: Common English words in title
-        english_title_words = [
-            "the",
-            "and",
-            "or",
-            "but",
-            "in",
-            "on",
-            "at",
-            "to",
-            "for",
-            "of",
-            "with",
-            "by",
-            "about",
-            "home",
-            "page",
-            "blog",
-            "site",
-            "web",
-            "news",
-            "contact",
-            "portfolio",
-            "work",
-            "project",
-            "code",
-            "tech",
-            "development",
-            "design",
-            "digital",
-        ]
-
-        title_lower = title.lower()
-        title_english_words = sum(
-            1 for word in english_title_words if word in title_lower
-        )
-
-        if title_english_words >= 2:
-            logger.info(f"✅ Found {title_english_words} English words in title")
-            return True
-
-        # Check 3: Page content sample
-        # Get some text content from the page
-        content_selectors = ["p", "h1", "h2", "h3", "nav", "main", "article"]
-        sample_text = ""
-
-        for selector in content_selectors:
-            elements = page.query_selector_all(selector)
-            for element in elements[:3]:  # Limit to first 3 of each type
-                text = element.text_content()
-                if text:
-                    sample_text += text + " "
-                if len(sample_text) > 500:  # Get enough sample text
-                    break
-            if len(sample_text) > 500:
-                break
-
-        # Check for English words in content
-        common_english_words = [
-            "the",
-            "and",
-            "or",
-            "but",
-            "in",
-            "on",
-            "at",
-            "to",
-            "for",
-            "of",
-            "with",
-            "by",
-            "this",
-            "that",
-            "are",
-            "is",
-            "was",
-            "were",
-            "be",
-            "been",
-            "have",
-            "has",
-            "had",
-            "will",
-            "would",
-            "could",
-            "should",
-            "can",
-            "may",
-            "might",
-            "must",
-            "shall",
-            "about",
-            "after",
-            "before",
-            "during",
-            "through",
-            "over",
-            "under",
-            "above",
-            "home",
-            "page",
-            "site",
-            "website",
-            "blog",
-            "post",
-            "article",
-            "content",
-        ]
-
-        if sample_text:
-            sample_lower = sample_text.lower()
-            english_word_count = sum(
-                1 for word in common_english_words if f" {word} " in f" {sample_lower} "
-            )
-
-            # Calculate rough percentage
-            total_words = len(sample_text.split())
-            if total_words > 0:
-                english_percentage = (
-                    english_word_count / min(total_words, 50)
-                ) * 100  # Cap at 50 words for percentage calc
-                logger.info(
-                    f"English word analysis: {english_word_count} common English words, ~{english_percentage:.1f}% English"
-                )
-
-                if english_percentage >= 20:  # If at least 20% common English words
-                    logger.info(
-                        "✅ Content appears to be English based on word analysis"
-                    )
-                    return True
-
-        # Check 4: Navigation and common page elements
-        nav_elements = page.query_selector_all("nav a, .nav a, .menu a, header a")
-        nav_text = ""
-        for element in nav_elements[:10]:  # Check first 10 nav links
-            text = element.text_content()
-            if text:
-                nav_text += text.lower() + " "
-
-        english_nav_words = [
-            "home",
-            "about",
-            "contact",
-            "blog",
-            "work",
-            "portfolio",
-            "projects",
-            "services",
-        ]
-        nav_english_count = sum(1 for word in english_nav_words if word in nav_text)
-
-        if nav_english_count >= 2:
-            logger.info(f"✅ Found {nav_english_count} English navigation words")
-            return True
-
-        logger.info("❌ Site does not appear to be primarily English")
-        return False
-
-    except Exception as e:
-        logger.warning(f"Error detecting English content: {e}")
-        # Default to True if we can't determine (benefit of the doubt)
-        return True
+def markdown_link_section(heading: str, links) -> str:
+    """Render a markdown section listing (url, title) pairs as bullet links."""
+    items = "".join(f"- [{title}]({url})\n" for url, title in links)
+    return f"{heading}\n\n{items}\n"
 
 
 def generate_simple_512kb_markdown(sites: List[Tuple[str, str, str]]) -> str:
@@ -441,12 +360,9 @@ def generate_simple_512kb_markdown(sites: List[Tuple[str, str, str]]) -> str:
     if not sites:
         return "## 512KB Club Sites\n\n*No English sites found*\n"
 
-    markdown = "## 512KB Club Sites\n\n"
-    for url, title, _ in sites:
-        markdown += f"- [{title}]({url})\n"
-    markdown += "\n"
-
-    return markdown
+    return markdown_link_section(
+        "## 512KB Club Sites", ((url, title) for url, title, _ in sites)
+    )
 
 
 def generate_markdown_for_site(site_name: str, posts: List[Dict[str, str]]) -> str:
@@ -454,18 +370,19 @@ def generate_markdown_for_site(site_name: str, posts: List[Dict[str, str]]) -> s
     if not posts:
         return f"## {site_name}\n\n*No recent posts found*\n"
 
-    markdown = f"## {site_name}\n\n"
-    for post in posts:
-        markdown += f"- [{post['title']}]({post['url']})\n"
-    markdown += "\n"
-
-    return markdown
+    return markdown_link_section(
+        f"## {site_name}", ((post["url"], post["title"]) for post in posts)
+    )
 
 
 def get_hackernews_stories_by_type(
-    story_type: str, count: int = 10, url_exists_func=None
+    story_type: str, count: int = 10, url_exists_func=None, story_cache=None
 ) -> List[Tuple[str, str, str]]:
-    """Get Hacker News stories by type (show, new, top, etc.)."""
+    """Get Hacker News stories by type (show, new, top, etc.).
+
+    `story_cache` maps story IDs to already known details, as returned by
+    load_hn_items(); stories fetched here are added to it.
+    """
     logger.debug(f"Fetching {count} stories from Hacker News {story_type}")
 
     # Map story types to API endpoints
@@ -481,37 +398,35 @@ def get_hackernews_stories_by_type(
 
     try:
         # Get story IDs
-        with httpx.Client(timeout=10.0) as client:
-            response = client.get(endpoints[story_type])
-            response.raise_for_status()
-            story_ids = response.json()[: count * 2]  # Get more IDs than needed
+        # Get more IDs than needed
+        story_ids = fetch_hn_story_ids(endpoints[story_type])[: count * 2]
 
-        stories = []
-        source = f"hackernews-{story_type}"
-
-        for story_id in story_ids:
-            if len(stories) >= count:
-                break
+        details = get_cached_hackernews_story_details(
+            story_ids, {} if story_cache is None else story_cache
+        )
 
-            story_details = get_hackernews_story_details(story_id)
-            if not story_details:
-                continue
+        source = f"hackernews-{story_type}"
 
-            url = story_details.get("url")
-            title = story_details.get("title")
+        def candidates():
+            for story_id, story_details in zip(story_ids, details):
+                if not story_details:
+                    continue
 
-            # Create HN link if no external URL
-            if not url:
-                url = f"https://news.ycombinator.com/item?id={story_id}"
+                # Create HN link if no external URL
+                url = (
+                    story_details.get("url")
+                    or f"https://news.ycombinator.com/item?id={story_id}"
+                )
+                title = story_details.get("title")
 
-            if title:
-                # Check if this URL already exists in our database
-                if url_exists_func is None or not url_exists_func(url):
-                    stories.append((url, title, source))
-                else:
-                    logger.debug(f"Story URL already in database: {url}")
+                if title:
+                    # Check if this URL already exists in our database
+                    if url_exists_func is None or not url_exists_func(url):
+                        yield url, title, source
+                    else:
+                        logger.debug(f"Story URL already in database: {url}")
 
-            time.sleep(0.2)  # Rate limiting
+        stories = list(islice(candidates(), count))
 
         logger.info(f"Retrieved {len(stories)} {story_type} stories")
         return stories
@@ -525,21 +440,14 @@ def generate_hackernews_markdown(
     show_stories: List[Tuple[str, str, str]], new_stories: List[Tuple[str, str, str]]
 ) -> str:
     """Generate combined markdown for Hacker News show and new stories."""
-    markdown = ""
-
-    if show_stories:
-        markdown += "## Hacker News - Show HN\n\n"
-        for url, title, _ in show_stories:
-            markdown += f"- [{title}]({url})\n"
-        markdown += "\n"
-
-    if new_stories:
-        markdown += "## Hacker News - New Stories\n\n"
-        for url, title, _ in new_stories:
-            markdown += f"- [{title}]({url})\n"
-        markdown += "\n"
-
-    return markdown
+    return "".join(
+        markdown_link_section(heading, ((url, title) for url, title, _ in stories))
+        for heading, stories in (
+            ("## Hacker News - Show HN", show_stories),
+            ("## Hacker News - New Stories", new_stories),
+        )
+        if stories
+    )
 
 
 def get_reduced_indieblog_posts(
@@ -551,10 +459,12 @@ def get_reduced_indieblog_posts(
     posts = []
     attempts = 0
     max_attempts = count * 3  # Try more than needed to account for duplicates
+    consecutive_failures = 0
 
     while len(posts) < count and attempts < max_attempts:
         try:
             url, title = get_random_indieblog()
+            consecutive_failures = 0
 
             # Check if this URL already exists in our database
             if url_exists_func is None or not url_exists_func(url):
@@ -562,27 +472,34 @@ def get_reduced_indieblog_posts(
             else:
                 logger.debug(f"Indie blog URL already in database: {url}")
 
-            time.sleep(1)  # Rate limiting
-
         except Exception as e:
             logger.warning(f"Failed to get indie blog post: {e}")
+            consecutive_failures += 1
+            time.sleep(backoff_delay(consecutive_failures))
 
         attempts += 1
 
     return posts[:count]
 
 
+def collect_indieblog_posts(
+    count: int = 5, url_exists_func=None
+) -> List[Tuple[str, str, str]]:
+    """Get random indie blog posts on a worker thread, closing its browser afterwards."""
+    try:
+        return get_reduced_indieblog_posts(count, url_exists_func)
+    finally:
+        close_browser()
+
+
 def generate_indieblog_markdown(posts: List[Tuple[str, str, str]]) -> str:
     """Generate markdown for indie blog posts."""
     if not posts:
         return "## IndieWeb Blogs\n\n*No posts found*\n"
 
-    markdown = "## IndieWeb Blogs\n\n"
-    for url, title, _ in posts:
-        markdown += f"- [{title}]({url})\n"
-    markdown += "\n"
-
-    return markdown
+    return markdown_link_section(
+        "## IndieWeb Blogs", ((url, title) for url, title, _ in posts)
+    )
 
 
 def save_markdown_report(markdown_content: str):
@@ -591,8 +508,9 @@ def save_markdown_report(markdown_content: str):
     filename = f"scraped_sites_{timestamp}.md"
 
     try:
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(markdown_content)
+        # One encode and one write; the report is written once and never appended to
+        with open(filename, "wb") as f:
+            f.write(markdown_content.encode("utf-8"))
         logger.info(f"Saved markdown report to {filename}")
     except Exception as e:
         logger.error(f"Failed to save markdown report: {e}")
@@ -609,29 +527,52 @@ def update_site_english_status(
     """Update a site's English language status in the database.
     Updated 2025-06-16: Changed from blog analysis to English detection.
     """
-    conn = sqlite3.connect("random_sites.db", detect_types=sqlite3.PARSE_DECLTYPES)
-    cursor = conn.cursor()
-
-    now = datetime.now()
-    cursor.execute(
-        """
-        UPDATE sites
-        SET has_blog = ?, blog_status = ?, blog_posts_md = ?, last_blog_check = ?
-        WHERE url = ?
-    """,
-        (is_english, status, posts_md, now, url),
-    )
+    conn = get_db_connection()
+
+    now = datetime.now().isoformat()
+    with write_transaction(conn):
+        conn.execute(
+            """
+            UPDATE sites
+            SET has_blog = ?, blog_status = ?, blog_posts_md = ?, last_blog_check = ?
+            WHERE url = ?
+        """,
+            (is_english, status, posts_md, now, url),
+        )
 
-    conn.commit()
-    conn.close()
     logger.debug(f"Updated English status for {url}: {status}")
 
 
+def update_sites_english_status(results: List[Tuple[str, bool, str, Optional[str]]]):
+    """Update the English language status of several sites in a single transaction.
+
+    Args:
+        results: List of (url, is_english, status, posts_md) tuples
+    """
+    if not results:
+        return
+    conn = get_db_connection()
+    now = datetime.now().isoformat()
+    with write_transaction(conn):
+        conn.executemany(
+            """
+            UPDATE sites
+            SET has_blog = ?, blog_status = ?, blog_posts_md = ?, last_blog_check = ?
+            WHERE url = ?
+        """,
+            [
+                (is_english, status, posts_md, now, url)
+                for url, is_english, status, posts_md in results
+            ],
+        )
+    logger.debug(f"Updated English status for {len(results)} sites")
+
+
 def get_sites_needing_english_check(limit: int = 10) -> List[Tuple[str, str]]:
     """Get sites that need English language check (512kb sites without language status).
     Updated 2025-06-16: Changed from blog analysis to English detection.
     """
-    conn = sqlite3.connect("random_sites.db", detect_types=sqlite3.PARSE_DECLTYPES)
+    conn = get_db_connection()
     cursor = conn.cursor()
 
     cursor.execute(
@@ -644,9 +585,14 @@ def get_sites_needing_english_check(limit: int = 10) -> List[Tuple[str, str]]:
         (limit,),
     )
 
-    results = cursor.fetchall()
-    conn.close()
-    return results
+    return cursor.fetchall()
+
+
+# Number of English check results written per transaction during re-analysis
+ANALYZE_CHECKPOINT_ROWS = 25
+
+# Parallel English checks during re-analysis, each worker with its own browser
+ANALYZE_WORKERS = 4
 
 
 def analyze_existing_sites_for_english(limit=50):
@@ -658,21 +604,58 @@ def analyze_existing_sites_for_english(limit=50):
     sites_to_analyze = get_sites_needing_english_check(limit)
     logger.info(f"Found {len(sites_to_analyze)} sites to check")
 
-    for i, (url, title) in enumerate(sites_to_analyze, 1):
-        logger.info(f"Checking {i}/{len(sites_to_analyze)}: {url}")
+    # Workers take sites from a shared iterator and hand results back to this
+    # thread, which owns the database connection. Each worker puts None on the
+    # queue when it stops, however it stops
+    pending = enumerate(sites_to_analyze, 1)
+    pending_lock = threading.Lock()
+    finished = queue.Queue()
 
+    def worker():
         try:
-            is_english, posts_md, status = check_512kb_site_is_english(url, title)
-            update_site_english_status(url, is_english, status, posts_md)
-
-            # Rate limiting
-            time.sleep(2)
-
-        except Exception as e:
-            logger.error(f"Failed to check {url}: {e}")
-            update_site_english_status(url, False, "error")
-            continue
-
+            while True:
+                with pending_lock:
+                    item = next(pending, None)
+                if item is None:
+                    return
+                i, (url, title) = item
+                logger.info(f"Checking {i}/{len(sites_to_analyze)}: {url}")
+
+                try:
+                    is_english, posts_md, status = check_512kb_site_is_english(
+                        url, title
+                    )
+                    finished.put((url, is_english, status, posts_md))
+
+                except Exception as e:
+                    logger.error(f"Failed to check {url}: {e}")
+                    finished.put((url, False, "error", None))
+        finally:
+            try:
+                close_browser()
+            finally:
+                finished.put(None)
+
+    # Results are written in batches, so an interrupted run keeps most of its work
+    results = []
+    with ThreadPoolExecutor(max_workers=ANALYZE_WORKERS) as executor:
+        futures = [executor.submit(worker) for _ in range(ANALYZE_WORKERS)]
+
+        running = ANALYZE_WORKERS
+        while running:
+            result = finished.get()
+            if result is None:
+                running -= 1
+                continue
+            results.append(result)
+            if len(results) >= ANALYZE_CHECKPOINT_ROWS:
+                update_sites_english_status(results)
+                results = []
+
+    update_sites_english_status(results)
+    # Surface any error that stopped a worker early
+    for future in futures:
+        future.result()
     logger.info("English language check complete")
 
 
@@ -682,67 +665,54 @@ def generate_markdown_from_existing_data():
     """
     logger.info("Generating markdown from existing data")
 
-    conn = sqlite3.connect("random_sites.db", detect_types=sqlite3.PARSE_DECLTYPES)
-    cursor = conn.cursor()
-
-    # Get English 512kb sites
-    cursor.execute(
-        """
-        SELECT url, title FROM sites
-        WHERE has_blog = TRUE
-        AND source = '512kb.club'
-        ORDER BY last_blog_check DESC
-        LIMIT 20
-    """
-    )
-
-    english_sites = cursor.fetchall()
+    conn = get_db_connection()
 
-    # Get recent HN stories
-    cursor.execute(
+    # Fetch all three sections in one statement; each arm keeps its own
+    # ORDER BY/LIMIT and is tagged with the section it belongs to
+    sections = {0: [], 1: [], 2: []}
+    for section, url, title in conn.execute(
         """
-        SELECT url, title FROM sites
-        WHERE source LIKE 'hackernews-%'
-        ORDER BY capture_date DESC
-        LIMIT 20
-    """
-    )
-
-    hn_stories = cursor.fetchall()
-
-    # Get recent indie blogs
-    cursor.execute(
-        """
-        SELECT url, title FROM sites
-        WHERE source = 'indieblog.page'
-        ORDER BY capture_date DESC
-        LIMIT 10
+        SELECT 0, url, title FROM (
+            -- English 512kb sites
+            SELECT url, title FROM sites
+            WHERE has_blog = TRUE
+            AND source = '512kb.club'
+            ORDER BY last_blog_check DESC
+            LIMIT 20
+        )
+        UNION ALL
+        SELECT 1, url, title FROM (
+            -- Recent HN stories
+            SELECT url, title FROM sites
+            WHERE source LIKE 'hackernews-%'
+            ORDER BY capture_date DESC
+            LIMIT 20
+        )
+        UNION ALL
+        SELECT 2, url, title FROM (
+            -- Recent indie blogs
+            SELECT url, title FROM sites
+            WHERE source = 'indieblog.page'
+            ORDER BY capture_date DESC
+            LIMIT 10
+        )
     """
-    )
+    ):
+        sections[section].append((url, title))
 
-    indie_blogs = cursor.fetchall()
-    conn.close()
+    english_sites, hn_stories, indie_blogs = sections[0], sections[1], sections[2]
 
     # Generate markdown
     markdown_sections = []
 
-    if english_sites:
-        sites_markdown = "## 512KB Club Sites (English)\n\n"
-        for url, title in english_sites:
-            sites_markdown += f"- [{title}]({url})\n"
-        markdown_sections.append(sites_markdown.rstrip())
-
-    if hn_stories:
-        hn_markdown = "## Recent Hacker News Stories\n\n"
-        for url, title in hn_stories:
-            hn_markdown += f"- [{title}]({url})\n"
-        markdown_sections.append(hn_markdown.rstrip())
-
-    if indie_blogs:
-        indie_markdown = "## Recent IndieWeb Blogs\n\n"
-        for url, title in indie_blogs:
-            indie_markdown += f"- [{title}]({url})\n"
-        markdown_sections.append(indie_markdown.rstrip())
+    for heading, rows in (
+        ("## 512KB Club Sites (English)", english_sites),
+        ("## Recent Hacker News Stories", hn_stories),
+        ("## Recent IndieWeb Blogs", indie_blogs),
+    ):
+        if rows:
+            links = "\n".join(f"- [{title}]({url})" for url, title in rows)
+            markdown_sections.append(f"{heading}\n\n{links}")
 
     final_markdown = "\n\n".join(markdown_sections)
     save_markdown_report(final_markdown)
@@ -755,8 +725,102 @@ def generate_markdown_from_existing_data():
 # =============================================================================
 
 
+# Parallel 512kb.club workers, each with its own browser. Landing page visits
+# stay serialized by the host rate limiter; the English checks overlap
+KB_WORKERS = 3
+
+
+def collect_512kb_sites(count: int = 10, max_attempts: int = 20, url_exists_func=None):
+    """
+    Collect new random 512kb.club sites and check which of them are English.
+
+    Args:
+        count: Number of new sites to collect
+        max_attempts: Maximum number of random sites to fetch
+        url_exists_func: Function to check if URL is already known
+
+    Returns:
+        Tuple of (sites, english_sites, english_results), where the sites are
+        (url, title, source) tuples and english_results are
+        (url, is_english, status, posts_md) tuples
+    """
+    sites = []
+    english_sites = []
+    english_results = []
+    attempts = 0
+    in_flight = 0
+    state_lock = threading.Lock()
+    started = time.monotonic()
+
+    def worker():
+        nonlocal attempts, in_flight
+        consecutive_failures = 0
+        try:
+            while True:
+                # Only start another attempt if it could still be needed
+                with state_lock:
+                    if len(sites) + in_flight >= count or attempts >= max_attempts:
+                        return
+                    attempts += 1
+                    in_flight += 1
+                    attempt = attempts
+                logger.debug(
+                    f"512kb attempt {attempt}/{max_attempts}, collected {len(sites)}/{count} sites"
+                )
+
+                result = None
+                try:
+                    url, title = get_random_site()
+                    consecutive_failures = 0
+                    logger.debug(f"Got site: {url} - {title}")
+
+                    if url_exists_func is None or not url_exists_func(url):
+                        # Check if site is English
+                        is_english, posts_md, status = check_512kb_site_is_english(
+                            url, title
+                        )
+                        logger.debug(
+                            f"English check result: is_english={is_english}, status={status}"
+                        )
+                        result = (url, title, is_english, status, posts_md)
+                    else:
+                        logger.debug(f"Site already in database, skipping: {url}")
+
+                except Exception as e:
+                    logger.error(
+                        f"Error processing 512kb site (attempt {attempt}): {e}"
+                    )
+                    if VERBOSE:
+                        logger.debug(f"Full traceback: {traceback.format_exc()}")
+                    consecutive_failures += 1
+                    time.sleep(backoff_delay(consecutive_failures))
+
+                finally:
+                    with state_lock:
+                        in_flight -= 1
+                        if result is not None:
+                            url, title, is_english, status, posts_md = result
+                            sites.append((url, title, "512kb.club"))
+                            english_results.append((url, is_english, status, posts_md))
+                            if is_english:
+                                english_sites.append((url, title, "512kb.club"))
+        finally:
+            close_browser()
+
+    with ThreadPoolExecutor(max_workers=KB_WORKERS) as executor:
+        for future in [executor.submit(worker) for _ in range(KB_WORKERS)]:
+            future.result()
+
+    logger.info(
+        f"512kb collection complete. Processed {len(sites)} sites "
+        f"in {attempts} attempts ({time.monotonic() - started:.1f}s), "
+        f"{len(english_sites)} are English"
+    )
+    return sites, english_sites, english_results
+
+
 def collect_unique_sites_enhanced(
-    local=False, url_exists_func=None, add_url_to_db_func=None
+    local=False, url_exists_func=None, add_urls_to_db_func=None
 ):
     """
     Enhanced version of collect_unique_sites with new markdown generation.
@@ -765,7 +829,8 @@ def collect_unique_sites_enhanced(
     Args:
         local: Whether to run in local mode
         url_exists_func: Function to check if URL exists in database
-        add_url_to_db_func: Function to add URL to database
+        add_urls_to_db_func: Function to add a batch of (url, title, source) rows to
+            database, called once with every site collected in the run
 
     Returns:
         Tuple of (collected_sites, markdown_content)
@@ -775,70 +840,46 @@ def collect_unique_sites_enhanced(
     collected_sites = []
     markdown_sections = []
 
-    # 1. Enhanced 512kb collection with English detection
-    logger.info("=" * 60)
-    logger.info("STARTING 512KB COLLECTION WITH ENGLISH DETECTION")
-    logger.info("=" * 60)
+    # Rows are written in batches, so URLs picked up earlier in this run are not
+    # in the database yet and have to be tracked here as well
+    seen_urls = set()
+    seen_lock = threading.Lock()
 
-    sites_512kb_english = []
-    unique_sites_collected = 0
-    attempts = 0
-    max_attempts = 20
-
-    while unique_sites_collected < 10 and attempts < max_attempts:
-        attempts += 1
-        logger.info(
-            f"512kb attempt {attempts}/{max_attempts}, collected {unique_sites_collected}/10 sites"
+    def already_seen(url):
+        with seen_lock:
+            if url in seen_urls or (
+                url_exists_func is not None and url_exists_func(url)
+            ):
+                return True
+            seen_urls.add(url)
+            return False
+
+    # Recently fetched Hacker News stories; the workers add what they fetch
+    story_cache = load_hn_items()
+    cached_story_ids = set(story_cache)
+
+    # Hacker News and indie blogs are fetched in the background while the
+    # 512kb.club workers run; the indie worker uses its own browser. Leaving the
+    # block waits for them, even when the 512kb.club collection fails
+    with ThreadPoolExecutor(max_workers=3) as background:
+        show_future = background.submit(
+            get_hackernews_stories_by_type, "show", 5, already_seen, story_cache
         )
+        new_future = background.submit(
+            get_hackernews_stories_by_type, "new", 5, already_seen, story_cache
+        )
+        indie_future = background.submit(collect_indieblog_posts, 5, already_seen)
 
-        try:
-            logger.info(f"Getting random site from 512kb.club...")
-            url, title = get_random_site()
-            logger.info(f"Got site: {url} - {title}")
-
-            if url_exists_func is None or not url_exists_func(url):
-                logger.info(f"Site is new, checking if English...")
-
-                # Check if site is English
-                is_english, posts_md, status = check_512kb_site_is_english(url, title)
-                logger.info(
-                    f"English check result: is_english={is_english}, status={status}"
-                )
-
-                # Add to database with English status
-                if add_url_to_db_func:
-                    logger.info(f"Adding to database...")
-                    add_url_to_db_func(url, title, "512kb.club")
-                    update_site_english_status(url, is_english, status, posts_md)
-                    logger.info(f"Added to database successfully")
-
-                collected_sites.append((url, title, "512kb.club"))
-
-                if is_english:
-                    sites_512kb_english.append((url, title, "512kb.club"))
-                    logger.info(
-                        f"Added English site! Total English 512kb sites: {len(sites_512kb_english)}"
-                    )
-                else:
-                    logger.info(f"Site is not English, not added to English list")
-
-                unique_sites_collected += 1
-                logger.info(f"Successfully processed site {unique_sites_collected}/10")
-            else:
-                logger.info(f"Site already in database, skipping: {url}")
-
-            logger.info(f"Sleeping for 2 seconds...")
-            time.sleep(2)
+        # 1. Enhanced 512kb collection with English detection
+        logger.info("=" * 60)
+        logger.info("STARTING 512KB COLLECTION WITH ENGLISH DETECTION")
+        logger.info("=" * 60)
 
-        except Exception as e:
-            logger.error(f"Error processing 512kb site (attempt {attempts}): {e}")
-            import traceback
+        sites_512kb, sites_512kb_english, english_results = collect_512kb_sites(
+            10, 20, already_seen
+        )
 
-            logger.error(f"Full traceback: {traceback.format_exc()}")
-
-    logger.info(
-        f"512kb collection complete. Processed {unique_sites_collected} sites, {len(sites_512kb_english)} are English"
-    )
+    collected_sites.extend(sites_512kb)
 
     # Generate 512kb markdown
     logger.info(
@@ -860,17 +901,19 @@ def collect_unique_sites_enhanced(
     logger.info("STARTING HACKER NEWS COLLECTION")
     logger.info("=" * 60)
 
-    show_stories = get_hackernews_stories_by_type("show", 5, url_exists_func)
-    new_stories = get_hackernews_stories_by_type("new", 5, url_exists_func)
+    show_stories = show_future.result()
+    new_stories = new_future.result()
+    save_hn_items(
+        {
+            story_id: story
+            for story_id, story in story_cache.items()
+            if story_id not in cached_story_ids
+        }
+    )
 
     logger.info(f"Got {len(show_stories)} show stories, {len(new_stories)} new stories")
 
-    # Add to database
-    if add_url_to_db_func:
-        for url, title, source in show_stories + new_stories:
-            add_url_to_db_func(url, title, source)
-
-    collected_sites.extend(show_stories + new_stories)
+    collected_sites.extend(chain(show_stories, new_stories))
 
     # Generate HN markdown
     hn_markdown = generate_hackernews_markdown(show_stories, new_stories)
@@ -885,16 +928,17 @@ def collect_unique_sites_enhanced(
     logger.info("STARTING INDIE BLOG COLLECTION")
     logger.info("=" * 60)
 
-    indie_posts = get_reduced_indieblog_posts(5, url_exists_func)
+    indie_posts = indie_future.result()
     logger.info(f"Got {len(indie_posts)} indie blog posts")
 
-    # Add to database
-    if add_url_to_db_func:
-        for url, title, source in indie_posts:
-            add_url_to_db_func(url, title, source)
-
     collected_sites.extend(indie_posts)
 
+    # Write every site from this run in one batch, then record the English
+    # status of the 512kb sites it just inserted
+    if add_urls_to_db_func:
+        add_urls_to_db_func(collected_sites)
+        update_sites_english_status(english_results)
+
     # Generate indie markdown
     indie_markdown = generate_indieblog_markdown(indie_posts)
     if indie_markdown.strip():
@@ -909,9 +953,10 @@ def collect_unique_sites_enhanced(
     logger.info("=" * 60)
 
     logger.info(f"Total markdown sections: {len(markdown_sections)}")
-    for i, section in enumerate(markdown_sections, 1):
-        logger.info(f"Section {i} length: {len(section)} chars")
-        logger.info(f"Section {i} preview: {section[:100]}...")
+    if VERBOSE:
+        for i, section in enumerate(markdown_sections, 1):
+            logger.debug(f"Section {i} length: {len(section)} chars")
+            logger.debug(f"Section {i} preview: {section[:100]}...")
 
     final_markdown = ""
     if markdown_sections:
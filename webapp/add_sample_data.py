@@ -49,18 +49,15 @@ def add_sample_data():
         ("https://www.notion.so", "Notion", "Productivity", "2025-04-03"),
     ]
 
-    # Insert data, handling duplicate URLs
-    for item in sample_data:
-        try:
-            db.execute(
-                "INSERT INTO sites (url, title, source, capture_date) VALUES (?, ?, ?, ?)",
-                item,
-            )
-            print(f"Added: {item[1]}")
-        except sqlite3.IntegrityError:
-            print(f"Skipped (already exists): {item[1]}")
-
-    db.commit()
+    # Insert data in one transaction, skipping URLs that already exist
+    changes_before = db.total_changes
+    with db:
+        db.executemany(
+            "INSERT OR IGNORE INTO sites (url, title, source, capture_date) VALUES (?, ?, ?, ?)",
+            sample_data,
+        )
+    added = db.total_changes - changes_before
+    print(f"Added {added} sample sites, skipped {len(sample_data) - added} existing")
 
     # Verify data was added
     count = db.execute("SELECT COUNT(*) FROM sites").fetchone()[0]
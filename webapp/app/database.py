@@ -1,11 +1,24 @@
 from flask import current_app, g
 import sqlite3
 import os
-import traceback
+import random
 from .logger import logger
 
 DATABASE = "instance/catalog.db"
 
+# Per-connection tuning for the read-only page queries: a 16 MB page cache, so
+# the row fetch can reuse pages the id scan before it already read from the
+# COS mount. Nothing sorts or builds temp tables any more, so temp_store keeps
+# its default. The journal mode is left alone: the file is mounted from COS
+# and replaced by the collector, and WAL needs shared-memory locking that the
+# bucket mount cannot provide
+DB_PRAGMAS = ("PRAGMA cache_size = -16384",)
+
+
+def dict_factory(cursor, row):
+    # Rows come back as plain dicts, ready for templates and jsonify
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
 
 def get_db():
     if "db" not in g:
@@ -18,7 +31,9 @@ def get_db():
                 current_app.config["DATABASE"]
                 # Removed detect_types=sqlite3.PARSE_DECLTYPES to avoid timestamp conversion
             )
-            g.db.row_factory = sqlite3.Row
+            g.db.row_factory = dict_factory
+            for pragma in DB_PRAGMAS:
+                g.db.execute(pragma)
             logger.debug(f"Connected to database: {current_app.config['DATABASE']}")
         except Exception as e:
             logger.error(f"Database connection error: {str(e)}")
@@ -72,78 +87,63 @@ def init_app(app):
                 )
                 """
                 )
+                # Same per-source index the collector creates, for id sampling
+                db.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_sites_source_recent "
+                    "ON sites(source, capture_date)"
+                )
                 db.commit()
             logger.info(f"Successfully connected to database at {db_path}")
     except Exception as e:
         logger.error(f"Failed to initialize database: {str(e)}")
 
 
-def get_random_entries(count):
-    logger.info(f"Fetching {count} random entries from sites table")
-    db = get_db()
-    try:
-        # First, check if the table exists
-        logger.debug("Checking if sites table exists")
-        table_check_query = (
-            "SELECT name FROM sqlite_master WHERE type='table' AND name='sites'"
-        )
-        table_check_result = db.execute(table_check_query).fetchone()
-
-        if not table_check_result:
-            logger.error("Sites table does not exist")
-            return []
-
-        logger.debug("Sites table exists, querying for random entries")
+def fetch_entries(db, ids):
+    # Rows for the given ids, in the same order
+    if not ids:
+        return []
 
-        # Query the sites table for random entries
-        cursor = db.execute(
-            "SELECT id, url, title, source, capture_date FROM sites ORDER BY RANDOM() LIMIT ?",
-            (count,),
+    placeholders = ", ".join("?" * len(ids))
+    rows = {
+        row["id"]: row
+        for row in db.execute(
+            "SELECT id, url, title, source, capture_date FROM sites "
+            f"WHERE id IN ({placeholders})",
+            ids,
         )
+    }
+    return [rows[entry_id] for entry_id in ids]
 
-        entries = []
-        for row in cursor:
-            # Manually create a dictionary without relying on automatic conversions
-            entry = {
-                "id": row["id"],
-                "url": row["url"],
-                "title": row["title"],
-                "source": row["source"],
-                "capture_date": row["capture_date"],  # Store as-is without conversion
-            }
-            entries.append(entry)
-
-        logger.info(f"Retrieved {len(entries)} entries from sites table")
-        return entries
-    except Exception as e:
-        logger.error(f"Database error: {str(e)}")
-        # Print full stack trace for debugging
-        logger.error(traceback.format_exc())
-        return []
 
-
-def get_entries_by_source(source, limit=10):
-    logger.info(f"Fetching {limit} entries from source: {source}")
+def get_entries_by_sources(limits):
+    # Random entries for several sources at once, e.g. {"512kb.club": 10};
+    # one id scan and one row fetch instead of two queries per source
+    logger.info(f"Fetching entries from sources: {limits}")
     db = get_db()
     try:
-        cursor = db.execute(
-            "SELECT id, url, title, source, capture_date FROM sites WHERE source = ? ORDER BY RANDOM() LIMIT ?",
-            (source, limit),
+        placeholders = ", ".join("?" * len(limits))
+        ids_by_source = {source: [] for source in limits}
+        for row in db.execute(
+            f"SELECT id, source FROM sites WHERE source IN ({placeholders})",
+            list(limits),
+        ):
+            ids_by_source[row["source"]].append(row["id"])
+
+        sampled = {
+            source: random.sample(ids, min(limits[source], len(ids)))
+            for source, ids in ids_by_source.items()
+        }
+        rows = fetch_entries(db, [i for ids in sampled.values() for i in ids])
+
+        entries = {source: [] for source in limits}
+        for row in rows:
+            entries[row["source"]].append(row)
+
+        logger.info(
+            f"Retrieved {sum(map(len, entries.values()))} entries from "
+            f"{len(limits)} sources"
         )
-
-        entries = []
-        for row in cursor:
-            entry = {
-                "id": row["id"],
-                "url": row["url"],
-                "title": row["title"],
-                "source": row["source"],
-                "capture_date": row["capture_date"],
-            }
-            entries.append(entry)
-
-        logger.info(f"Retrieved {len(entries)} entries from source: {source}")
         return entries
-    except Exception as e:
-        logger.error(f"Database error fetching entries by source: {str(e)}")
-        return []
+    except sqlite3.Error as e:
+        logger.error(f"Database error fetching entries by sources: {str(e)}")
+        return {source: [] for source in limits}
@@ -1,3 +1,5 @@
+import os
+
 from tamga import Tamga
 
 # Initialize Tamga logger with more configuration
@@ -6,3 +8,9 @@ logger = Tamga(
     logToConsole=True,
     logFile="app.log",
 )
+
+# Set VERBOSE=1 to keep DEBUG messages, which are dropped otherwise. This is
+# the same switch the collector's LockedTamga (logger.py at the repo root)
+# reads; the webapp image ships without that module, so only the gate is here
+if os.getenv("VERBOSE") != "1":
+    logger.debug = lambda message: None
@@ -1,5 +1,7 @@
+from urllib.parse import quote
+
 from flask import Blueprint, render_template, jsonify
-from .database import get_random_entries, get_entries_by_source
+from .database import get_entries_by_sources
 from .logger import logger
 
 routes = Blueprint("routes", __name__)
@@ -10,20 +12,23 @@ def index():
     logger.info("Processing request for index route")
 
     # Get entries for each source - updating to match actual database source names
-    # For Hacker News, we'll combine both hackernews sources
-    hackernews_new = get_entries_by_source("hackernews-new", 5)
-    hackernews_show = get_entries_by_source("hackernews-show", 5)
-    hackernews_entries = hackernews_new + hackernews_show
+    entries = get_entries_by_sources(
+        {
+            "hackernews-new": 5,
+            "hackernews-show": 5,
+            "indieblog.page": 10,
+            "512kb.club": 10,
+        }
+    )
 
-    # These match your actual source names
-    indieblog_entries = get_entries_by_source("indieblog.page", 10)
-    kb512_entries = get_entries_by_source("512kb.club", 10)
+    # For Hacker News, we'll combine both hackernews sources
+    hackernews_entries = entries["hackernews-new"] + entries["hackernews-show"]
 
     return render_template(
         "index.html",
         hackernews_entries=hackernews_entries,
-        indieblog_entries=indieblog_entries,
-        kb512_entries=kb512_entries,
+        indieblog_entries=entries["indieblog.page"],
+        kb512_entries=entries["512kb.club"],
     )
 
 
@@ -33,23 +38,31 @@ def api_random_entries():
         logger.info("API request for random entries")
 
         # Get entries for each source - using actual database source names
-        hackernews_new = get_entries_by_source("hackernews-new", 3)
-        hackernews_show = get_entries_by_source("hackernews-show", 3)
-        indieblog_entries = get_entries_by_source("indieblog.page", 5)
-        kb512_entries = get_entries_by_source("512kb.club", 5)
+        entries = get_entries_by_sources(
+            {
+                "hackernews-new": 3,
+                "hackernews-show": 3,
+                "indieblog.page": 5,
+                "512kb.club": 5,
+            }
+        )
 
         all_entries = (
-            hackernews_new + hackernews_show + indieblog_entries + kb512_entries
+            entries["hackernews-new"]
+            + entries["hackernews-show"]
+            + entries["indieblog.page"]
+            + entries["512kb.club"]
         )
 
-        entries_list = []
-        for entry in all_entries:
-            entry_dict = entry.copy()
-            entry_dict["description"] = entry["source"]
-            entry_dict[
-                "image_url"
-            ] = f"https://via.placeholder.com/300x200?text={entry['title']}"
-            entries_list.append(entry_dict)
+        entries_list = [
+            {
+                **entry,
+                "description": entry["source"],
+                "image_url": "https://via.placeholder.com/300x200?text="
+                + quote(entry["title"] or ""),
+            }
+            for entry in all_entries
+        ]
 
         return jsonify({"entries": entries_list})
     except Exception as e:
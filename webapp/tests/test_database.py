@@ -0,0 +1,72 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from app import create_app
+from app.config import Config
+from app.database import get_entries_by_sources
+
+
+class TestEntriesBySources(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        database = os.path.join(self.tmpdir.name, "catalog.db")
+        with sqlite3.connect(database) as conn:
+            conn.execute(
+                """
+                CREATE TABLE sites (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url TEXT UNIQUE,
+                    title TEXT,
+                    source TEXT,
+                    capture_date TIMESTAMP
+                )
+            """
+            )
+            conn.executemany(
+                "INSERT INTO sites (url, title, source, capture_date) "
+                "VALUES (?, ?, ?, '2025-06-16T12:00:00')",
+                [
+                    (f"https://{source}.example/{i}", f"{source} {i}", source)
+                    for source, count in (("512kb.club", 5), ("indieblog", 2))
+                    for i in range(count)
+                ],
+            )
+        conn.close()
+
+        # create_app() opens the database, so point it at the test file first
+        with mock.patch.object(Config, "DATABASE", database):
+            self.app = create_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        self.app_context.pop()
+        self.tmpdir.cleanup()
+
+    def test_samples_each_source(self):
+        entries = get_entries_by_sources({"512kb.club": 3, "indieblog": 1})
+
+        self.assertEqual(len(entries["512kb.club"]), 3)
+        self.assertEqual(len(entries["indieblog"]), 1)
+        for source, rows in entries.items():
+            for row in rows:
+                self.assertEqual(row["source"], source)
+                self.assertTrue(row["url"].startswith(f"https://{source}.example/"))
+        urls = [row["url"] for row in entries["512kb.club"]]
+        self.assertEqual(len(set(urls)), 3)
+
+    def test_limit_larger_than_source(self):
+        entries = get_entries_by_sources({"indieblog": 10})
+        self.assertEqual(len(entries["indieblog"]), 2)
+
+    def test_unknown_source(self):
+        entries = get_entries_by_sources({"512kb.club": 2, "nowhere": 5})
+        self.assertEqual(len(entries["512kb.club"]), 2)
+        self.assertEqual(entries["nowhere"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()